@@ -0,0 +1,65 @@
+"""Add analyst_stats leaderboard table
+
+Revision ID: 002
+Revises: 001
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002'
+down_revision = '001'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Create analyst_stats table
+    op.create_table('analyst_stats',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('total_analyses', sa.Integer(), nullable=False),
+        sa.Column('success_count', sa.Integer(), nullable=False),
+        sa.Column('success_rate', sa.Float(), nullable=False),
+        sa.Column('subscriber_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    op.create_index('ix_analyst_stats_success_rate', 'analyst_stats', [sa.text('success_rate DESC'), sa.text('user_id DESC')], unique=False)
+    op.create_index('ix_analyst_stats_subscriber_count', 'analyst_stats', [sa.text('subscriber_count DESC'), sa.text('user_id DESC')], unique=False)
+    op.create_index('ix_analyst_stats_total_analyses', 'analyst_stats', [sa.text('total_analyses DESC'), sa.text('user_id DESC')], unique=False)
+
+    # Backfill statistics for existing analysts
+    op.execute("""
+        INSERT INTO analyst_stats (user_id, total_analyses, success_count, success_rate, subscriber_count)
+        SELECT
+            u.id,
+            COALESCE(a.total, 0),
+            COALESCE(a.success, 0),
+            CASE WHEN COALESCE(a.total, 0) > 0 THEN a.success * 100.0 / a.total ELSE 0 END,
+            COALESCE(s.subscribers, 0)
+        FROM users u
+        LEFT JOIN (
+            SELECT author_id,
+                   COUNT(*) AS total,
+                   SUM(CASE WHEN success_status = 'success' THEN 1 ELSE 0 END) AS success
+            FROM analyses
+            GROUP BY author_id
+        ) a ON a.author_id = u.id
+        LEFT JOIN (
+            SELECT creator_id, COUNT(*) AS subscribers
+            FROM subscriptions
+            WHERE status = 'active'
+            GROUP BY creator_id
+        ) s ON s.creator_id = u.id
+    """)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analyst_stats_total_analyses', table_name='analyst_stats')
+    op.drop_index('ix_analyst_stats_subscriber_count', table_name='analyst_stats')
+    op.drop_index('ix_analyst_stats_success_rate', table_name='analyst_stats')
+    op.drop_table('analyst_stats')
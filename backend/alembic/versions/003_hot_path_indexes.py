@@ -0,0 +1,42 @@
+"""Add composite indexes for router query predicates
+
+Revision ID: 003
+Revises: 002
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '003'
+down_revision = '002'
+branch_labels = None
+depends_on = None
+
+
+# (index name, table, columns)
+INDEXES = [
+    ('ix_analyses_created_at_id', 'analyses', ['created_at', 'id']),
+    ('ix_analyses_author_id_created_at', 'analyses', ['author_id', 'created_at', 'id']),
+    ('ix_analyses_ticker_symbol_created_at', 'analyses', ['ticker_symbol', 'created_at', 'id']),
+    ('ix_analyses_author_id_success_status', 'analyses', ['author_id', 'success_status']),
+    ('ix_subscriptions_subscriber_id_creator_id_status', 'subscriptions', ['subscriber_id', 'creator_id', 'status']),
+    ('ix_subscriptions_creator_id_status', 'subscriptions', ['creator_id', 'status']),
+    ('ix_analysis_images_analysis_id', 'analysis_images', ['analysis_id']),
+    ('ix_analysis_tags_analysis_id', 'analysis_tags', ['analysis_id']),
+    ('ix_analysis_tags_tag_id', 'analysis_tags', ['tag_id']),
+]
+
+
+def upgrade() -> None:
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True)
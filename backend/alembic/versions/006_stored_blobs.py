@@ -0,0 +1,41 @@
+"""Add content-addressed stored_blobs and analysis_images.blob_digest
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '006'
+down_revision = '005'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('stored_blobs',
+        sa.Column('digest', sa.String(length=64), nullable=False),
+        sa.Column('path', sa.String(), nullable=False),
+        sa.Column('size', sa.Integer(), nullable=False),
+        sa.Column('content_type', sa.String(), nullable=True),
+        sa.Column('ref_count', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.PrimaryKeyConstraint('digest')
+    )
+    # Existing images keep their flat file paths and a NULL digest
+    op.add_column('analysis_images', sa.Column('blob_digest', sa.String(length=64), nullable=True))
+    op.create_foreign_key(
+        'fk_analysis_images_blob_digest', 'analysis_images', 'stored_blobs', ['blob_digest'], ['digest']
+    )
+    op.create_index('ix_analysis_images_blob_digest', 'analysis_images', ['blob_digest'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_analysis_images_blob_digest', table_name='analysis_images')
+    op.drop_constraint('fk_analysis_images_blob_digest', 'analysis_images', type_='foreignkey')
+    op.drop_column('analysis_images', 'blob_digest')
+    op.drop_table('stored_blobs')
@@ -0,0 +1,38 @@
+"""Add analyses.search_vector with a GIN index for full-text search
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '007'
+down_revision = '006'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('analyses', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+    # Same document as app.services.search_service.search_document
+    op.execute("""
+        UPDATE analyses SET search_vector =
+            setweight(to_tsvector('english', coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('english', coalesce(content, '')), 'B')
+    """)
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_analyses_search_vector', 'analyses', ['search_vector'],
+            postgresql_using='gin', postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_analyses_search_vector', table_name='analyses', postgresql_concurrently=True)
+    op.drop_column('analyses', 'search_vector')
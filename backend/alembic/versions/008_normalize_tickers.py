@@ -0,0 +1,28 @@
+"""Normalize analyses.ticker_symbol to trimmed upper case
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '008'
+down_revision = '007'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Same rule as app.models.normalize_ticker
+    op.execute("""
+        UPDATE analyses SET ticker_symbol = NULLIF(upper(trim(ticker_symbol)), '')
+        WHERE ticker_symbol IS DISTINCT FROM NULLIF(upper(trim(ticker_symbol)), '')
+    """)
+
+
+def downgrade() -> None:
+    # Original spellings are not kept
+    pass
@@ -0,0 +1,33 @@
+"""Replace ix_analysis_tags_tag_id with a covering (tag_id, analysis_id) index
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '009'
+down_revision = '008'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Tag filters resolve tag ids to analysis ids from the index alone
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_analysis_tags_tag_id_analysis_id', 'analysis_tags', ['tag_id', 'analysis_id'],
+            postgresql_concurrently=True
+        )
+        op.drop_index('ix_analysis_tags_tag_id', table_name='analysis_tags', postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index('ix_analysis_tags_tag_id', 'analysis_tags', ['tag_id'], postgresql_concurrently=True)
+        op.drop_index(
+            'ix_analysis_tags_tag_id_analysis_id', table_name='analysis_tags', postgresql_concurrently=True
+        )
@@ -0,0 +1,73 @@
+"""Add timeline_entries and analyses.fanned_out for the subscription feed
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from app.config import settings
+
+
+# revision identifiers, used by Alembic.
+revision = '010'
+down_revision = '009'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('timeline_entries',
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('analysis_id', sa.Integer(), nullable=False),
+        sa.Column('author_id', sa.Integer(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+        sa.ForeignKeyConstraint(['analysis_id'], ['analyses.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('user_id', 'analysis_id')
+    )
+    op.create_index(
+        'ix_timeline_entries_user_id_created_at', 'timeline_entries', ['user_id', 'created_at', 'analysis_id']
+    )
+    op.add_column('analyses', sa.Column('fanned_out', sa.Boolean(), server_default='false', nullable=False))
+    
+    # Materialize the recent analyses of existing active subscriptions, as FeedService.backfill does
+    # on subscribe; creators above feed_fanout_max_subscribers stay fan-out-on-read (fanned_out false)
+    op.execute(f"""
+        UPDATE analyses SET fanned_out = true
+        WHERE created_at IS NOT NULL AND author_id NOT IN (
+            SELECT creator_id FROM subscriptions
+            WHERE status = 'active'
+            GROUP BY creator_id
+            HAVING count(DISTINCT subscriber_id) > {settings.feed_fanout_max_subscribers}
+        )
+    """)
+    op.execute(f"""
+        INSERT INTO timeline_entries (user_id, analysis_id, author_id, created_at)
+        SELECT subscriber_id, id, author_id, created_at FROM (
+            SELECT s.subscriber_id, a.id, a.author_id, a.created_at,
+                   row_number() OVER (
+                       PARTITION BY s.subscriber_id, a.author_id ORDER BY a.created_at DESC, a.id DESC
+                   ) AS position
+            FROM (SELECT DISTINCT subscriber_id, creator_id FROM subscriptions WHERE status = 'active') s
+            JOIN analyses a ON a.author_id = s.creator_id AND a.fanned_out
+        ) recent
+        WHERE position <= {settings.feed_backfill_size}
+    """)
+    
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_analyses_pull_author_id_created_at', 'analyses', ['author_id', 'created_at', 'id'],
+            postgresql_where=sa.text('NOT fanned_out'), postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_analyses_pull_author_id_created_at', table_name='analyses', postgresql_concurrently=True
+        )
+    op.drop_column('analyses', 'fanned_out')
+    op.drop_index('ix_timeline_entries_user_id_created_at', table_name='timeline_entries')
+    op.drop_table('timeline_entries')
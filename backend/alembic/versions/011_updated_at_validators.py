@@ -0,0 +1,39 @@
+"""Default updated_at on insert and index it for conditional GET validators
+
+Revision ID: 011
+Revises: 010
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '011'
+down_revision = '010'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    for table in ('users', 'analyses'):
+        op.execute(f"UPDATE {table} SET updated_at = created_at WHERE updated_at IS NULL")
+        op.alter_column(table, 'updated_at', server_default=sa.text('now()'))
+    
+    # max(updated_at) is answered from the end of each index
+    with op.get_context().autocommit_block():
+        op.create_index('ix_users_updated_at', 'users', ['updated_at'], postgresql_concurrently=True)
+        op.create_index('ix_analyses_updated_at', 'analyses', ['updated_at'], postgresql_concurrently=True)
+        op.create_index(
+            'ix_analyst_stats_updated_at', 'analyst_stats', ['updated_at'], postgresql_concurrently=True
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_analyst_stats_updated_at', table_name='analyst_stats', postgresql_concurrently=True)
+        op.drop_index('ix_analyses_updated_at', table_name='analyses', postgresql_concurrently=True)
+        op.drop_index('ix_users_updated_at', table_name='users', postgresql_concurrently=True)
+    for table in ('users', 'analyses'):
+        op.alter_column(table, 'updated_at', server_default=None)
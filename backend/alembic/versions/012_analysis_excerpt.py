@@ -0,0 +1,56 @@
+"""Add analyses.excerpt for summary list views
+
+Revision ID: 012
+Revises: 011
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '012'
+down_revision = '011'
+branch_labels = None
+depends_on = None
+
+EXCERPT_LENGTH = 280
+BATCH_SIZE = 1000
+
+
+def make_excerpt(content):
+    # Same rule as app.models.make_excerpt
+    text = " ".join((content or "").split())
+    if len(text) <= EXCERPT_LENGTH:
+        return text
+    cut = text[:EXCERPT_LENGTH - 1]
+    if text[EXCERPT_LENGTH - 1] != " ":
+        cut = cut.rsplit(" ", 1)[0] or cut
+    return cut.rstrip(" .,;:") + "…"
+
+
+def upgrade() -> None:
+    op.add_column('analyses', sa.Column('excerpt', sa.String(), nullable=True))
+    
+    bind = op.get_bind()
+    analyses = sa.table('analyses', sa.column('id', sa.Integer), sa.column('content', sa.Text), sa.column('excerpt', sa.String))
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(analyses.c.id, analyses.c.content)
+            .where(analyses.c.id > last_id)
+            .order_by(analyses.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not rows:
+            break
+        bind.execute(
+            analyses.update().where(analyses.c.id == sa.bindparam('row_id')),
+            [{'row_id': row.id, 'excerpt': make_excerpt(row.content)} for row in rows]
+        )
+        last_id = rows[-1].id
+
+
+def downgrade() -> None:
+    op.drop_column('analyses', 'excerpt')
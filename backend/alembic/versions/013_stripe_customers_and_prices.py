@@ -0,0 +1,38 @@
+"""Persist Stripe customers on users and prices per creator fee
+
+Revision ID: 013
+Revises: 012
+Create Date: 2026-10-17 00:00:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '013'
+down_revision = '012'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('stripe_customer_id', sa.String(), nullable=True))
+    op.create_unique_constraint('uq_users_stripe_customer_id', 'users', ['stripe_customer_id'])
+    
+    op.create_table('stripe_prices',
+        sa.Column('creator_id', sa.Integer(), nullable=False),
+        sa.Column('unit_amount', sa.Integer(), nullable=False),
+        sa.Column('stripe_price_id', sa.String(), nullable=False),
+        sa.Column('stripe_product_id', sa.String(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['creator_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('creator_id', 'unit_amount'),
+        sa.UniqueConstraint('stripe_price_id')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('stripe_prices')
+    op.drop_constraint('uq_users_stripe_customer_id', 'users', type_='unique')
+    op.drop_column('users', 'stripe_customer_id')
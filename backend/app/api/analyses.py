@@ -1,11 +1,20 @@
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, Form
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-import os
-from .. import models, schemas, auth
-from ..database import get_db
-from ..config import settings
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import models, schemas, auth, loaders
+from ..database import get_db, get_async_db
+from ..pagination import apply_cursor, fetch_page
+from ..conditional import not_modified, latest
+from ..serialization import ANALYSIS_LIST, analysis_fields_adapter, json_response, parse_analysis_fields
+from ..uploads import save_uploads, discard_uploads
+from ..services.entitlement_service import EntitlementService
+from ..services.image_service import process_image_variants
+from ..services.storage_service import StorageService
+from ..services.search_service import SearchService
+from ..services.tag_service import TagService, parse_tags
+from ..services.feed_service import FeedService
 
 router = APIRouter(prefix="/analyses", tags=["analyses"])
 
@@ -13,21 +22,30 @@ router = APIRouter(prefix="/analyses", tags=["analyses"])
 @router.post("/", response_model=schemas.AnalysisResponse)
 @router.post("", response_model=schemas.AnalysisResponse, include_in_schema=False)
 def create_analysis(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     content: str = Form(...),
     target_price: float = Form(...),
     current_price: Optional[float] = Form(None),
     time_horizon: str = Form(...),
     ticker_symbol: Optional[str] = Form(None),
+    tags: Optional[str] = Form(None, description="Comma-separated tag names"),
     image1: Optional[UploadFile] = File(None),
     image2: Optional[UploadFile] = File(None),
     image3: Optional[UploadFile] = File(None),
     image4: Optional[UploadFile] = File(None),
     image5: Optional[UploadFile] = File(None),
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Create a new analysis"""
+    # Stage image uploads concurrently before opening a transaction, so it is not held during file I/O
+    images = [
+        img for img in [image1, image2, image3, image4, image5]
+        if img is not None and img.content_type.startswith('image/')
+    ]
+    saved = save_uploads(images)
+    
     # Create analysis
     analysis = models.Analysis(
         title=title,
@@ -36,87 +54,147 @@ def create_analysis(
         current_price=current_price,
         time_horizon=time_horizon,
         ticker_symbol=ticker_symbol,
-        author_id=current_user.id
+        author_id=principal.user_id
     )
     
-    db.add(analysis)
+    try:
+        db.add(analysis)
+        TagService.set_tags(db, analysis, parse_tags(tags))
+        db.flush()  # Assigns analysis.id without committing
+        blobs = StorageService.store(db, saved)
+        
+        analysis_images = [
+            models.AnalysisImage(
+                analysis_id=analysis.id,
+                image_path=blob.path,
+                blob_digest=blob.digest,
+                caption=item.upload.filename
+            )
+            for item, blob in zip(saved, blobs)
+        ]
+        db.add_all(analysis_images)
+        FeedService.fan_out(db, analysis)
+        db.flush()
+    except Exception:
+        discard_uploads(saved)
+        StorageService.abort(db)
+        raise
     db.commit()
-    db.refresh(analysis)
     
-    # Handle image uploads
-    images = [img for img in [image1, image2, image3, image4, image5] if img is not None]
-    if images:
-        for image in images:
-            if image.content_type.startswith('image/'):
-                # Save image
-                filename = f"{analysis.id}_{image.filename}"
-                file_path = os.path.join(settings.upload_dir, filename)
-                
-                os.makedirs(settings.upload_dir, exist_ok=True)
-                with open(file_path, "wb") as buffer:
-                    buffer.write(image.file.read())
-                
-                # Create image record
-                analysis_image = models.AnalysisImage(
-                    analysis_id=analysis.id,
-                    image_path=file_path,
-                    caption=image.filename
-                )
-                db.add(analysis_image)
-        
-        db.commit()
-        db.refresh(analysis)
+    # Thumbnails and WebP variants are generated after the response is sent
+    if analysis_images:
+        background_tasks.add_task(process_image_variants, [image.id for image in analysis_images])
     
     return analysis
 
 
 @router.get("/", response_model=List[schemas.AnalysisResponse])
 @router.get("", response_model=List[schemas.AnalysisResponse], include_in_schema=False)
-def get_analyses(
+async def get_analyses(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
     author_id: Optional[int] = Query(None),
     ticker_symbol: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    tags: Optional[str] = Query(None, description="Comma-separated tag names"),
+    tag_match: str = Query("any", pattern="^(any|all)$"),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or summary"),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of analyses"""
-    query = db.query(models.Analysis)
+    """Get list of analyses, newest first. Pass X-Next-Cursor back as cursor to get the next page"""
+    fieldset = parse_analysis_fields(fields)
+    statement = select(models.Analysis)
     
     if author_id:
-        query = query.filter(models.Analysis.author_id == author_id)
+        statement = statement.filter(models.Analysis.author_id == author_id)
     
     if ticker_symbol:
-        query = query.filter(models.Analysis.ticker_symbol == ticker_symbol)
+        statement = statement.filter(models.Analysis.ticker_symbol == models.normalize_ticker(ticker_symbol))
+    
+    statement = TagService.filter_by_tags(statement, parse_tags(tags), match_all=tag_match == "all")
+    
+    # Answer revalidations from index-backed maxima before running the page query
+    validators = (await db.execute(select(
+        statement.with_only_columns(
+            func.max(models.Analysis.updated_at), maintain_column_froms=True
+        ).scalar_subquery(),
+        select(func.max(models.User.updated_at)).scalar_subquery(),
+        select(func.max(models.AnalystStats.updated_at)).scalar_subquery()
+    ))).one()
+    cached = not_modified(request, response, validators, latest(*validators))
+    if cached:
+        return cached
     
-    analyses = query.order_by(models.Analysis.created_at.desc()).offset(skip).limit(limit).all()
-    return analyses
+    if fieldset:
+        statement = statement.options(*loaders.analysis_fields_options(fieldset))
+    else:
+        statement = statement.options(*loaders.analysis_options())
+    statement = apply_cursor(statement, [models.Analysis.created_at, models.Analysis.id], cursor)
+    analyses = await fetch_page(
+        db, statement.offset(skip), limit, response,
+        key=lambda analysis: (analysis.created_at, analysis.id)
+    )
+    return json_response(analysis_fields_adapter(fieldset) if fieldset else ANALYSIS_LIST, analyses, response)
+
+
+@router.get("/search", response_model=List[schemas.AnalysisSearchResult])
+async def search_analyses(
+    q: str = Query(..., min_length=1, max_length=200),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(20, ge=1, le=100),
+    author_id: Optional[int] = Query(None),
+    ticker_symbol: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Full-text search over analysis titles and content, best match first"""
+    results = await SearchService.search(db, q, skip, limit, author_id=author_id, ticker_symbol=ticker_symbol)
+    return [
+        schemas.AnalysisSearchResult.model_validate(analysis).model_copy(update={"rank": rank, "headline": headline})
+        for analysis, rank, headline in results
+    ]
 
 
 @router.get("/{analysis_id}", response_model=schemas.AnalysisResponse)
-def get_analysis(
+async def get_analysis(
     analysis_id: int,
-    current_user: Optional[models.User] = Depends(auth.get_current_user),
-    db: Session = Depends(get_db)
+    request: Request,
+    response: Response,
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get analysis by ID"""
-    analysis = db.query(models.Analysis).filter(models.Analysis.id == analysis_id).first()
-    if not analysis:
+    header = (await db.execute(
+        select(models.Analysis.author_id, models.Analysis.updated_at, models.User.updated_at)
+        .join(models.User, models.User.id == models.Analysis.author_id)
+        .filter(models.Analysis.id == analysis_id)
+    )).first()
+    if not header:
         raise HTTPException(status_code=404, detail="Analysis not found")
+    author_id, *validators = header
     
     # Check if user is subscribed to the author
-    if current_user and current_user.id != analysis.author_id:
-        subscription = db.query(models.Subscription).filter(
-            models.Subscription.subscriber_id == current_user.id,
-            models.Subscription.creator_id == analysis.author_id,
-            models.Subscription.status == "active"
-        ).first()
-        
-        if not subscription:
+    if principal.user_id != author_id:
+        if not await EntitlementService.is_subscribed_async(db, principal.user_id, author_id):
             raise HTTPException(
                 status_code=403,
                 detail="You need to subscribe to this user to view their analyses"
             )
     
+    cached = not_modified(request, response, validators, latest(*validators))
+    if cached:
+        return cached
+    
+    result = await db.execute(
+        select(models.Analysis).options(
+            *loaders.analysis_options("joined")
+        ).filter(models.Analysis.id == analysis_id)
+    )
+    analysis = result.unique().scalars().first()
+    if not analysis:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    
     return analysis
 
 
@@ -124,7 +202,7 @@ def get_analysis(
 def update_analysis(
     analysis_id: int,
     analysis_update: schemas.AnalysisUpdate,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Update analysis"""
@@ -132,10 +210,14 @@ def update_analysis(
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    if analysis.author_id != current_user.id:
+    if analysis.author_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to update this analysis")
     
-    for field, value in analysis_update.dict(exclude_unset=True).items():
+    update_data = analysis_update.dict(exclude_unset=True)
+    if "tags" in update_data:
+        TagService.set_tags(db, analysis, parse_tags(update_data.pop("tags")))
+        analysis.updated_at = func.now()  # Tags live in another table
+    for field, value in update_data.items():
         setattr(analysis, field, value)
     
     db.commit()
@@ -146,7 +228,7 @@ def update_analysis(
 @router.delete("/{analysis_id}")
 def delete_analysis(
     analysis_id: int,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Delete analysis"""
@@ -154,34 +236,41 @@ def delete_analysis(
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    if analysis.author_id != current_user.id:
+    if analysis.author_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to delete this analysis")
     
+    digests = [image.blob_digest for image in analysis.images]
+    for image in analysis.images:
+        db.delete(image)
+    FeedService.remove_analysis(db, analysis.id)
     db.delete(analysis)
+    StorageService.release(db, digests)
     db.commit()
+    StorageService.collect(db, digests)
     
     return {"message": "Analysis deleted successfully"}
 
 
 @router.get("/{analysis_id}/images", response_model=List[schemas.AnalysisImageResponse])
-def get_analysis_images(
+async def get_analysis_images(
     analysis_id: int,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get images for a specific analysis"""
-    images = db.query(models.AnalysisImage).filter(
+    images = await db.scalars(select(models.AnalysisImage).filter(
         models.AnalysisImage.analysis_id == analysis_id
-    ).all()
+    ))
     
-    return images
+    return images.all()
 
 
 @router.post("/{analysis_id}/images", response_model=schemas.AnalysisImageResponse)
 def add_analysis_image(
+    background_tasks: BackgroundTasks,
     analysis_id: int,
     image: UploadFile = File(...),
     caption: Optional[str] = Form(None),
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Add image to analysis"""
@@ -190,29 +279,35 @@ def add_analysis_image(
     if not analysis:
         raise HTTPException(status_code=404, detail="Analysis not found")
     
-    if analysis.author_id != current_user.id:
+    if analysis.author_id != principal.user_id:
         raise HTTPException(status_code=403, detail="Not authorized to add images to this analysis")
     
     if not image.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
     # Save image
-    filename = f"{analysis_id}_{image.filename}"
-    file_path = os.path.join(settings.upload_dir, filename)
-    
-    os.makedirs(settings.upload_dir, exist_ok=True)
-    with open(file_path, "wb") as buffer:
-        buffer.write(image.file.read())
-    
-    # Create image record
-    analysis_image = models.AnalysisImage(
-        analysis_id=analysis_id,
-        image_path=file_path,
-        caption=caption
-    )
-    
-    db.add(analysis_image)
+    saved = save_uploads([image])
+    try:
+        blob, = StorageService.store(db, saved)
+        
+        # Create image record
+        analysis_image = models.AnalysisImage(
+            analysis_id=analysis_id,
+            image_path=blob.path,
+            blob_digest=blob.digest,
+            caption=caption
+        )
+        
+        db.add(analysis_image)
+        analysis.updated_at = func.now()
+        db.flush()
+    except Exception:
+        discard_uploads(saved)
+        StorageService.abort(db)
+        raise
     db.commit()
     db.refresh(analysis_image)
     
+    background_tasks.add_task(process_image_variants, [analysis_image.id])
+    
     return analysis_image 
\ No newline at end of file
@@ -1,6 +1,7 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 from .. import models, schemas, auth
 from ..auth import oauth2_scheme
@@ -10,21 +11,31 @@ from ..config import settings
 router = APIRouter(prefix="/auth", tags=["authentication"])
 
 
+def _find_existing_user(db: Session, email: str, username: str):
+    return db.query(models.User).filter(
+        (models.User.email == email) | (models.User.username == username)
+    ).first()
+
+
+def _save_user(db: Session, db_user: models.User):
+    db.add(db_user)
+    db.commit()
+    db.refresh(db_user)
+
+
 @router.post("/register", response_model=schemas.UserResponse)
-def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
+async def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
     """Register a new user"""
     # Check if user already exists
-    db_user = db.query(models.User).filter(
-        (models.User.email == user.email) | (models.User.username == user.username)
-    ).first()
+    db_user = await run_in_threadpool(_find_existing_user, db, user.email, user.username)
     if db_user:
         raise HTTPException(
             status_code=400,
             detail="Email or username already registered"
         )
     
-    # Create new user
-    hashed_password = auth.get_password_hash(user.password)
+    # Create new user, hashing in the dedicated password pool
+    hashed_password = await auth.get_password_hash_async(user.password)
     db_user = models.User(
         username=user.username,
         email=user.email,
@@ -35,20 +46,18 @@ def register(user: schemas.UserCreate, db: Session = Depends(get_db)):
         hashed_password=hashed_password
     )
     
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await run_in_threadpool(_save_user, db, db_user)
     
     return db_user
 
 
 @router.post("/token", response_model=schemas.Token)
-def login_for_access_token(
+async def login_for_access_token(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """Login and get access token"""
-    user = auth.authenticate_user(db, form_data.username, form_data.password)
+    user = await auth.authenticate_user(db, form_data.username, form_data.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -58,7 +67,7 @@ def login_for_access_token(
     
     access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
     access_token = auth.create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data=auth.token_claims(user), expires_delta=access_token_expires
     )
     
     # Also create a refresh token
@@ -93,7 +102,7 @@ def refresh_access_token(
         # Create new access token
         access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
         access_token = auth.create_access_token(
-            data={"sub": user.username}, expires_delta=access_token_expires
+            data=auth.token_claims(user), expires_delta=access_token_expires
         )
         
         return {"access_token": access_token, "token_type": "bearer"}
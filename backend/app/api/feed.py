@@ -0,0 +1,29 @@
+from typing import List, Optional
+from fastapi import APIRouter, Depends, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas, auth, loaders
+from ..database import get_async_db
+from ..pagination import NEXT_CURSOR_HEADER
+from ..serialization import ANALYSIS_LIST, analysis_fields_adapter, json_response, parse_analysis_fields
+from ..services.feed_service import FeedService
+
+router = APIRouter(prefix="/feed", tags=["feed"])
+
+
+@router.get("/", response_model=List[schemas.AnalysisResponse])
+@router.get("", response_model=List[schemas.AnalysisResponse], include_in_schema=False)
+async def get_feed(
+    response: Response,
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, or summary"),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Analyses from creators you subscribe to, newest first. Pass X-Next-Cursor back as cursor to get the next page"""
+    fieldset = parse_analysis_fields(fields)
+    options = loaders.analysis_fields_options(fieldset) if fieldset else loaders.analysis_options()
+    analyses, next_cursor = await FeedService.feed(db, principal.user_id, limit, cursor, options=options)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return json_response(analysis_fields_adapter(fieldset) if fieldset else ANALYSIS_LIST, analyses, response)
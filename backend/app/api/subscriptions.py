@@ -1,116 +1,133 @@
 from typing import List
 from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from .. import models, schemas, auth
-from ..database import get_db
+from .. import models, schemas, auth, loaders
+from ..database import get_db, get_async_db
 from ..services.stripe_service import StripeService
+from ..services.entitlement_service import EntitlementService
+from ..services.feed_service import FeedService
 from ..config import settings
 from datetime import datetime
 
 router = APIRouter(prefix="/subscriptions", tags=["subscriptions"])
 
 
+def _stripe_subscription_statement(stripe_subscription_id: str):
+    return select(models.Subscription).filter(
+        models.Subscription.stripe_subscription_id == stripe_subscription_id
+    ).limit(1)
+
+
 @router.post("/", response_model=schemas.SubscriptionResponse)
-def create_subscription(
+async def create_subscription(
     subscription: schemas.SubscriptionCreate,
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Create a new subscription"""
+    current_user = await db.get(models.User, principal.user_id)
+    if current_user is None:
+        raise HTTPException(
+            status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"}
+        )
+    
     # Check if already subscribed
-    existing_subscription = db.query(models.Subscription).filter(
+    existing_subscription = await db.scalar(select(models.Subscription).filter(
         models.Subscription.subscriber_id == current_user.id,
         models.Subscription.creator_id == subscription.creator_id,
         models.Subscription.status == "active"
-    ).first()
+    ).limit(1))
     
     if existing_subscription:
         raise HTTPException(status_code=400, detail="Already subscribed to this user")
     
     # Get creator details
-    creator = db.query(models.User).filter(models.User.id == subscription.creator_id).first()
+    creator = await db.get(models.User, subscription.creator_id)
     if not creator:
         raise HTTPException(status_code=404, detail="Creator not found")
     
     if creator.monthly_fee <= 0:
         raise HTTPException(status_code=400, detail="This user doesn't charge for subscriptions")
+    # No transaction stays open while waiting on Stripe; loaded objects survive the commit
+    await db.commit()
     
-    # Create Stripe customer if doesn't exist
-    stripe_customer_id = None
-    if not hasattr(current_user, 'stripe_customer_id'):
-        stripe_customer_id = StripeService.create_customer(
-            current_user.email, 
-            current_user.full_name or current_user.username
-        )
-        # You might want to store this in your user model
-    
-    # Create Stripe price
-    price_id = StripeService.create_price(creator.monthly_fee)
+    # Reuse the subscriber's customer and the creator's price for this fee
+    known_customer_id = current_user.stripe_customer_id
+    customer_id = await StripeService.get_or_create_customer_async(db, current_user)
+    if customer_id != known_customer_id:
+        auth.invalidate_user(current_user.id)  # Cached profile predates the customer
+    price_id = await StripeService.get_or_create_price_async(db, creator)
     
-    # Create Stripe subscription
-    stripe_subscription = StripeService.create_subscription(
-        stripe_customer_id or "cus_default",  # Use default if no customer ID
-        price_id
-    )
+    # Create Stripe subscription; Stripe calls never hold a worker thread
+    stripe_subscription = await StripeService.create_subscription_async(customer_id, price_id)
     
     # Create subscription record
     db_subscription = models.Subscription(
         subscriber_id=current_user.id,
         creator_id=subscription.creator_id,
-        stripe_subscription_id=stripe_subscription.id,
+        stripe_subscription_id=stripe_subscription["id"],
         status="active",
-        current_period_start=datetime.fromtimestamp(stripe_subscription.current_period_start),
-        current_period_end=datetime.fromtimestamp(stripe_subscription.current_period_end)
+        current_period_start=datetime.fromtimestamp(stripe_subscription["current_period_start"]),
+        current_period_end=datetime.fromtimestamp(stripe_subscription["current_period_end"])
     )
     
     db.add(db_subscription)
-    db.commit()
-    db.refresh(db_subscription)
-    
-    return db_subscription
+    await db.run_sync(FeedService.backfill, current_user.id, subscription.creator_id)
+    await db.commit()
+    await EntitlementService.invalidate_async(db_subscription.subscriber_id, db_subscription.creator_id)
+    
+    return await db.scalar(
+        select(models.Subscription).options(*loaders.subscription_options()).filter(
+            models.Subscription.id == db_subscription.id
+        ).execution_options(populate_existing=True)
+    )
 
 
 @router.get("/", response_model=List[schemas.SubscriptionResponse])
 def get_subscriptions(
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Get current user's subscriptions"""
-    subscriptions = db.query(models.Subscription).filter(
-        models.Subscription.subscriber_id == current_user.id
+    subscriptions = db.query(models.Subscription).options(*loaders.subscription_options()).filter(
+        models.Subscription.subscriber_id == principal.user_id
     ).all()
     
     return subscriptions
 
 
 @router.delete("/{subscription_id}")
-def cancel_subscription(
+async def cancel_subscription(
     subscription_id: int,
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cancel a subscription"""
-    subscription = db.query(models.Subscription).filter(
+    subscription = await db.scalar(select(models.Subscription).filter(
         models.Subscription.id == subscription_id,
-        models.Subscription.subscriber_id == current_user.id
-    ).first()
+        models.Subscription.subscriber_id == principal.user_id
+    ))
     
     if not subscription:
         raise HTTPException(status_code=404, detail="Subscription not found")
     
     # Cancel in Stripe
     if subscription.stripe_subscription_id:
-        StripeService.cancel_subscription(subscription.stripe_subscription_id)
+        await db.commit()  # End the read transaction before waiting on Stripe
+        await StripeService.cancel_subscription_async(subscription.stripe_subscription_id)
     
     # Update local status
     subscription.status = "canceled"
-    db.commit()
+    await db.commit()
+    await EntitlementService.invalidate_async(subscription.subscriber_id, subscription.creator_id)
     
     return {"message": "Subscription canceled successfully"}
 
 
 @router.post("/webhook")
-async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
+async def stripe_webhook(request: Request, db: AsyncSession = Depends(get_async_db)):
     """Handle Stripe webhooks"""
     payload = await request.body()
     signature = request.headers.get("stripe-signature")
@@ -124,35 +141,34 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
     if event["type"] == "invoice.payment_succeeded":
         # Payment succeeded
         subscription_id = event["data"]["object"]["subscription"]
-        subscription = db.query(models.Subscription).filter(
-            models.Subscription.stripe_subscription_id == subscription_id
-        ).first()
+        subscription = await db.scalar(_stripe_subscription_statement(subscription_id))
         
         if subscription:
+            if subscription.status != "active":
+                await db.run_sync(FeedService.backfill, subscription.subscriber_id, subscription.creator_id)
             subscription.status = "active"
-            db.commit()
+            await db.commit()
+            await EntitlementService.invalidate_async(subscription.subscriber_id, subscription.creator_id)
     
     elif event["type"] == "invoice.payment_failed":
         # Payment failed
         subscription_id = event["data"]["object"]["subscription"]
-        subscription = db.query(models.Subscription).filter(
-            models.Subscription.stripe_subscription_id == subscription_id
-        ).first()
+        subscription = await db.scalar(_stripe_subscription_statement(subscription_id))
         
         if subscription:
             subscription.status = "past_due"
-            db.commit()
+            await db.commit()
+            await EntitlementService.invalidate_async(subscription.subscriber_id, subscription.creator_id)
     
     elif event["type"] == "customer.subscription.deleted":
         # Subscription deleted
         subscription_id = event["data"]["object"]["id"]
-        subscription = db.query(models.Subscription).filter(
-            models.Subscription.stripe_subscription_id == subscription_id
-        ).first()
+        subscription = await db.scalar(_stripe_subscription_statement(subscription_id))
         
         if subscription:
             subscription.status = "canceled"
-            db.commit()
+            await db.commit()
+            await EntitlementService.invalidate_async(subscription.subscriber_id, subscription.creator_id)
     
     return {"status": "success"}
 
@@ -160,14 +176,8 @@ async def stripe_webhook(request: Request, db: Session = Depends(get_db)):
 @router.get("/check/{creator_id}")
 def check_subscription(
     creator_id: int,
-    current_user: models.User = Depends(auth.get_current_active_user),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
     db: Session = Depends(get_db)
 ):
     """Check if current user is subscribed to a creator"""
-    subscription = db.query(models.Subscription).filter(
-        models.Subscription.subscriber_id == current_user.id,
-        models.Subscription.creator_id == creator_id,
-        models.Subscription.status == "active"
-    ).first()
-    
-    return {"is_subscribed": subscription is not None} 
\ No newline at end of file
+    return {"is_subscribed": EntitlementService.is_subscribed(db, principal.user_id, creator_id)} 
\ No newline at end of file
@@ -0,0 +1,17 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas
+from ..database import get_async_db
+from ..services.tag_service import TagService
+
+router = APIRouter(prefix="/tags", tags=["tags"])
+
+
+@router.get("/popular", response_model=List[schemas.TagCount])
+async def get_popular_tags(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Most used tags with the number of analyses carrying each"""
+    return await TagService.popular(db, limit)
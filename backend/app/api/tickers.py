@@ -0,0 +1,19 @@
+from typing import List
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from .. import schemas
+from ..database import get_async_db
+from ..services.ticker_service import TickerService
+
+router = APIRouter(prefix="/tickers", tags=["tickers"])
+
+
+@router.get("/autocomplete", response_model=List[schemas.TickerSuggestion])
+async def autocomplete_tickers(
+    q: str = Query(..., min_length=1, max_length=12),
+    limit: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Ticker symbols starting with q, ranked by number of analyses"""
+    suggestions = await TickerService.autocomplete(db, q, limit)
+    return [{"symbol": symbol, "analysis_count": count} for symbol, count in suggestions]
@@ -1,52 +1,55 @@
-from typing import List
-from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from .. import models, schemas, auth
-from ..database import get_db
+from .. import models, schemas, auth, loaders
+from ..database import get_db, get_async_db
+from ..pagination import apply_cursor, fetch_page
+from ..conditional import not_modified, latest
+from ..services.stats_service import StatsService
+from ..serialization import ANALYSIS_LIST, SUBSCRIPTION_LIST, USER_WITH_STATS_LIST, json_response
+from ..services.leaderboard_service import LeaderboardService
 
 router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/", response_model=List[schemas.UserWithStats])
-def get_users(
+async def get_users(
+    request: Request,
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db)
+    order_by: Optional[str] = Query(None, pattern="^(success_rate|subscriber_count|total_analyses)$"),
+    cursor: Optional[str] = Query(None),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Get list of users with their statistics"""
-    users = db.query(models.User).offset(skip).limit(limit).all()
+    """Get list of users with their statistics, optionally ranked"""
+    validators = (await db.execute(select(
+        select(func.max(models.User.updated_at)).scalar_subquery(),
+        select(func.max(models.AnalystStats.updated_at)).scalar_subquery()
+    ))).one()
+    cached = not_modified(request, response, validators, latest(*validators))
+    if cached:
+        return cached
     
-    result = []
-    for user in users:
-        # Calculate total analyses
-        total_analyses = db.query(func.count(models.Analysis.id)).filter(
-            models.Analysis.author_id == user.id
-        ).scalar()
-        
-        # Calculate success rate
-        success_count = db.query(func.count(models.Analysis.id)).filter(
-            models.Analysis.author_id == user.id,
-            models.Analysis.success_status == "success"
-        ).scalar()
-        
-        success_rate = (success_count / total_analyses * 100) if total_analyses > 0 else None
-        
-        # Count subscribers
-        subscriber_count = db.query(func.count(models.Subscription.id)).filter(
-            models.Subscription.creator_id == user.id,
-            models.Subscription.status == "active"
-        ).scalar()
-        
-        user_stats = schemas.UserWithStats(
-            **user.__dict__,
-            total_analyses=total_analyses,
-            success_rate=success_rate,
-            subscriber_count=subscriber_count
+    if order_by:
+        # Ranked pages are served from the precomputed leaderboard
+        statement = apply_cursor(
+            LeaderboardService.ranked_users_statement(order_by),
+            LeaderboardService.ranking_columns(order_by),
+            cursor
+        )
+        key = lambda row: (row.rank_value, row.id)
+    else:
+        statement = apply_cursor(
+            StatsService.users_with_stats_statement(), [models.User.id], cursor, descending=False
         )
-        result.append(user_stats)
+        key = lambda row: (row.id,)
+    
+    rows = await fetch_page(db, statement.offset(skip), limit, response, key=key, scalars=False)
     
-    return result
+    return json_response(USER_WITH_STATS_LIST, rows, response)
 
 
 @router.get("/me", response_model=schemas.UserResponse)
@@ -66,78 +69,92 @@ def update_user(
     """Update current user profile"""
     for field, value in user_update.dict(exclude_unset=True).items():
         setattr(current_user, field, value)
+    current_user.profile_version = models.User.profile_version + 1
     
     db.commit()
     db.refresh(current_user)
+    auth.invalidate_user(current_user.id)
     return current_user
 
 
 @router.get("/me/analyses", response_model=List[schemas.AnalysisResponse])
-def get_my_analyses(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_my_analyses(
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's analyses"""
-    analyses = db.query(models.Analysis).filter(
-        models.Analysis.author_id == current_user.id
-    ).order_by(models.Analysis.created_at.desc()).all()
+    statement = select(models.Analysis).options(*loaders.analysis_options()).filter(
+        models.Analysis.author_id == principal.user_id
+    )
+    statement = apply_cursor(statement, [models.Analysis.created_at, models.Analysis.id], cursor)
     
-    return analyses
+    analyses = await fetch_page(db, statement, limit, response, key=lambda analysis: (analysis.created_at, analysis.id))
+    return json_response(ANALYSIS_LIST, analyses, response)
 
 
 @router.get("/me/subscriptions", response_model=List[schemas.SubscriptionResponse])
-def get_my_subscriptions(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_my_subscriptions(
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's subscriptions"""
-    subscriptions = db.query(models.Subscription).filter(
-        models.Subscription.subscriber_id == current_user.id
-    ).all()
+    statement = select(models.Subscription).options(*loaders.subscription_options()).filter(
+        models.Subscription.subscriber_id == principal.user_id
+    )
+    statement = apply_cursor(statement, [models.Subscription.created_at, models.Subscription.id], cursor)
     
-    return subscriptions
+    subscriptions = await fetch_page(db, statement, limit, response, key=lambda subscription: (subscription.created_at, subscription.id))
+    return json_response(SUBSCRIPTION_LIST, subscriptions, response)
 
 
 @router.get("/me/subscribers", response_model=List[schemas.SubscriptionResponse])
-def get_my_subscribers(
-    current_user: models.User = Depends(auth.get_current_active_user),
-    db: Session = Depends(get_db)
+async def get_my_subscribers(
+    response: Response,
+    limit: int = Query(100, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    principal: schemas.TokenData = Depends(auth.get_current_principal),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Get current user's subscribers"""
-    subscriptions = db.query(models.Subscription).filter(
-        models.Subscription.creator_id == current_user.id
-    ).all()
+    statement = select(models.Subscription).options(*loaders.subscription_options()).filter(
+        models.Subscription.creator_id == principal.user_id
+    )
+    statement = apply_cursor(statement, [models.Subscription.created_at, models.Subscription.id], cursor)
     
-    return subscriptions
+    subscriptions = await fetch_page(db, statement, limit, response, key=lambda subscription: (subscription.created_at, subscription.id))
+    return json_response(SUBSCRIPTION_LIST, subscriptions, response)
 
 
 @router.get("/{user_id}", response_model=schemas.UserWithStats)
-def get_user(user_id: int, db: Session = Depends(get_db)):
+async def get_user(
+    user_id: int,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db)
+):
     """Get user by ID with statistics"""
-    user = db.query(models.User).filter(models.User.id == user_id).first()
-    if not user:
+    validators = (await db.execute(
+        select(models.User.updated_at, models.AnalystStats.updated_at)
+        .outerjoin(models.AnalystStats, models.AnalystStats.user_id == models.User.id)
+        .filter(models.User.id == user_id)
+    )).first()
+    if not validators:
         raise HTTPException(status_code=404, detail="User not found")
+    cached = not_modified(request, response, validators, latest(*validators))
+    if cached:
+        return cached
     
-    # Calculate statistics
-    total_analyses = db.query(func.count(models.Analysis.id)).filter(
-        models.Analysis.author_id == user.id
-    ).scalar()
-    
-    success_count = db.query(func.count(models.Analysis.id)).filter(
-        models.Analysis.author_id == user.id,
-        models.Analysis.success_status == "success"
-    ).scalar()
-    
-    success_rate = (success_count / total_analyses * 100) if total_analyses > 0 else None
-    
-    subscriber_count = db.query(func.count(models.Subscription.id)).filter(
-        models.Subscription.creator_id == user.id,
-        models.Subscription.status == "active"
-    ).scalar()
+    result = await db.execute(
+        StatsService.users_with_stats_statement().filter(models.User.id == user_id)
+    )
+    row = result.first()
+    if not row:
+        raise HTTPException(status_code=404, detail="User not found")
     
-    return schemas.UserWithStats(
-        **user.__dict__,
-        total_analyses=total_analyses,
-        success_rate=success_rate,
-        subscriber_count=subscriber_count
-    ) 
\ No newline at end of file
+    return schemas.UserWithStats.model_validate(row)
@@ -1,17 +1,44 @@
+import asyncio
+import hashlib
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy import inspect, select
 from . import models, schemas
-from .database import get_db
+from .cache import TTLCache
+from .database import get_db, AsyncSessionLocal
 from .config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=settings.bcrypt_rounds,
+    bcrypt__min_rounds=settings.bcrypt_rounds,  # Older, cheaper hashes are flagged for rehashing
+)
+
+# bcrypt releases the GIL, so a small dedicated pool keeps hashing off the
+# event loop and out of the threadpool shared by sync endpoints
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers,
+    thread_name_prefix="password-hash"
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="api/v1/auth/token")
 
+# Column values of recently loaded users, keyed by user id
+_user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl_seconds)
+
+# Verified claims keyed by token digest, each kept until the token's exp
+_token_cache = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+_revoked_tokens = TTLCache(maxsize=settings.token_cache_size, ttl=settings.token_cache_ttl_seconds)
+_revocation_hooks: List[Callable[[dict], bool]] = []
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -21,6 +48,25 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+async def get_password_hash_async(password: str) -> str:
+    """Hash a password in the dedicated password hashing pool"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
+async def verify_and_update_password_async(plain_password: str, hashed_password: str):
+    """Verify a password in the dedicated pool; returns (verified, new hash or None)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _password_executor, pwd_context.verify_and_update, plain_password, hashed_password
+    )
+
+
+def token_claims(user: models.User) -> dict:
+    """Claims identifying a user without a database lookup"""
+    return {"sub": user.username, "uid": user.id, "ver": user.profile_version}
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -42,20 +88,61 @@ def create_refresh_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
-def verify_token(token: str, credentials_exception):
+def _token_digest(token: str) -> str:
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+def add_revocation_hook(hook: Callable[[dict], bool]) -> None:
+    """Register a check called with the claims of every token; returning True rejects the token"""
+    _revocation_hooks.append(hook)
+
+
+def revoke_token(token: str) -> None:
+    """Reject a token in this process from now on, even if its claims are cached"""
+    digest = _token_digest(token)
+    _token_cache.delete(digest)
     try:
+        expires_in = jwt.get_unverified_claims(token)["exp"] - time.time()
+    except (JWTError, KeyError, TypeError):
+        expires_in = settings.token_cache_ttl_seconds
+    _revoked_tokens.set(digest, True, expires_in)
+
+
+def decode_token(token: str) -> dict:
+    """Verify a JWT, reusing the claims of tokens verified before"""
+    digest = _token_digest(token)
+    if _revoked_tokens.get(digest):
+        raise JWTError("Token has been revoked")
+
+    payload = _token_cache.get(digest)
+    if payload is None:
         payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        if isinstance(payload.get("exp"), (int, float)):
+            _token_cache.set(digest, payload, payload["exp"] - time.time())
+
+    if any(hook(payload) for hook in _revocation_hooks):
+        raise JWTError("Token has been revoked")
+    return payload
+
+
+def verify_token(token: str, credentials_exception):
+    try:
+        payload = decode_token(token)
         username: str = payload.get("sub")
         if username is None:
             raise credentials_exception
-        token_data = schemas.TokenData(username=username)
+        token_data = schemas.TokenData(
+            username=username,
+            user_id=payload.get("uid"),
+            version=payload.get("ver")
+        )
     except JWTError:
         raise credentials_exception
     return token_data
 
 def verify_refresh_token(token: str, credentials_exception):
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        payload = decode_token(token)
         username: str = payload.get("sub")
         token_type: str = payload.get("type")
         if username is None or token_type != "refresh":
@@ -66,16 +153,55 @@ def verify_refresh_token(token: str, credentials_exception):
     return token_data
 
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)):
-    credentials_exception = HTTPException(
+def _credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
-    token_data = verify_token(token, credentials_exception)
-    user = db.query(models.User).filter(models.User.username == token_data.username).first()
+
+
+def load_user(db: Session, user_id: int, min_version: Optional[int] = None) -> Optional[models.User]:
+    """Load a user, serving recently loaded users from cache instead of the database"""
+    cached = _user_cache.get(user_id)
+    if cached is not None and (min_version is None or cached["profile_version"] >= min_version):
+        user = models.User(**cached)
+        make_transient_to_detached(user)
+        return db.merge(user, load=False)
+
+    user = db.query(models.User).filter(models.User.id == user_id).first()
+    if user is not None:
+        _user_cache.set(user_id, {
+            attr.key: getattr(user, attr.key) for attr in inspect(models.User).column_attrs
+        })
+    return user
+
+
+def invalidate_user(user_id: int) -> None:
+    """Drop a cached user after its profile changed"""
+    _user_cache.delete(user_id)
+
+
+async def get_current_principal(token: str = Depends(oauth2_scheme)) -> schemas.TokenData:
+    """Identify the caller from token claims, without loading the user"""
+    token_data = verify_token(token, _credentials_exception())
+    if token_data.user_id is None:
+        # Tokens issued before user ids were embedded in the claims; only these need a session
+        async with AsyncSessionLocal() as db:
+            user_id = await db.scalar(select(models.User.id).filter(models.User.username == token_data.username))
+        if user_id is None:
+            raise _credentials_exception()
+        token_data.user_id = user_id
+    return token_data
+
+
+def get_current_user(
+    principal: schemas.TokenData = Depends(get_current_principal),
+    db: Session = Depends(get_db)
+):
+    user = load_user(db, principal.user_id, principal.version)
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
     return user
 
 
@@ -85,13 +211,27 @@ def get_current_active_user(current_user: models.User = Depends(get_current_user
     return current_user
 
 
-def authenticate_user(db: Session, username: str, password: str):
+def _get_user_by_login(db: Session, username: str) -> Optional[models.User]:
     # Try to find user by email or username
-    user = db.query(models.User).filter(
+    return db.query(models.User).filter(
         (models.User.email == username) | (models.User.username == username)
     ).first()
+
+
+def _save_password_hash(db: Session, user: models.User, hashed_password: str) -> None:
+    user.hashed_password = hashed_password
+    db.commit()
+    db.refresh(user)
+
+
+async def authenticate_user(db: Session, username: str, password: str):
+    user = await run_in_threadpool(_get_user_by_login, db, username)
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    verified, new_hash = await verify_and_update_password_async(password, user.hashed_password)
+    if not verified:
         return False
-    return user 
\ No newline at end of file
+    if new_hash:
+        # Stored hash uses outdated parameters, upgrade it transparently
+        await run_in_threadpool(_save_password_hash, db, user, new_hash)
+    return user
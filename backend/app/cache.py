@@ -0,0 +1,133 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+import redis
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+_redis_client = None
+_redis_lock = threading.Lock()
+_redis_down_until = 0.0
+
+# How long to stop talking to Redis after it fails, so an outage costs one timeout
+REDIS_RETRY_AFTER = 5.0
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache with a per-entry time to live"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            value, expires_at = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def get_redis() -> Optional[redis.Redis]:
+    """Shared Redis client, or None when the Redis cache tier is disabled"""
+    global _redis_client
+    if not settings.redis_cache_enabled:
+        return None
+    if _redis_client is None:
+        with _redis_lock:
+            if _redis_client is None:
+                _redis_client = redis.Redis.from_url(
+                    settings.redis_url,
+                    socket_timeout=settings.redis_socket_timeout,
+                    socket_connect_timeout=settings.redis_socket_timeout,
+                    decode_responses=True
+                )
+    return _redis_client
+
+
+def _redis_available() -> Optional[redis.Redis]:
+    if time.monotonic() < _redis_down_until:
+        return None
+    return get_redis()
+
+
+def _redis_failed() -> None:
+    global _redis_down_until
+    _redis_down_until = time.monotonic() + REDIS_RETRY_AFTER
+
+
+def redis_get(key: str) -> Optional[str]:
+    """Read a key from Redis, treating any Redis failure as a miss"""
+    client = _redis_available()
+    if client is None:
+        return None
+    try:
+        return client.get(key)
+    except redis.RedisError:
+        _redis_failed()
+        return None
+
+
+def redis_set(key: str, value: str, ttl: int) -> bool:
+    """Write a key to Redis with an expiry; False when Redis is enabled but the write failed"""
+    if ttl <= 0:
+        return redis_delete(key)
+    if not settings.redis_cache_enabled:
+        return True
+    client = _redis_available()
+    if client is None:
+        return False
+    try:
+        client.set(key, value, ex=ttl)
+        return True
+    except redis.RedisError:
+        _redis_failed()
+        return False
+
+
+def redis_delete(*keys: str) -> bool:
+    """Delete keys from Redis; False, and logged, when Redis is enabled but they may still be there"""
+    if not settings.redis_cache_enabled or not keys:
+        return True
+    client = _redis_available()
+    if client is None:
+        logger.warning("Redis is marked down, could not delete %s", ", ".join(keys))
+        return False
+    try:
+        client.delete(*keys)
+        return True
+    except redis.RedisError as e:
+        _redis_failed()
+        logger.warning("Could not delete %s from Redis: %s", ", ".join(keys), e)
+        return False
@@ -0,0 +1,180 @@
+import zlib
+from typing import Dict, Optional, Sequence
+import anyio
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # Optional: without it every client gets gzip
+    brotli = None
+
+# Media types worth compressing; images under /uploads are already compressed
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+# Larger bodies are compressed on a worker thread (zlib and brotli release the GIL) to keep the event loop responsive
+THREAD_OFFLOAD_SIZE = 64 * 1024
+
+
+def parse_accept_encoding(value: str) -> Dict[str, float]:
+    """Content codings of an Accept-Encoding header mapped to their q-values"""
+    codings = {}
+    for item in value.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, number = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(number)
+                except ValueError:
+                    q = 0.0
+        codings[coding.lower()] = q
+    return codings
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Supported coding the client prefers, brotli first on ties; None to send identity"""
+    codings = parse_accept_encoding(accept_encoding)
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    best, best_q = None, 0.0
+    for coding in supported:
+        q = codings.get(coding, codings.get("*", 0.0))
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)  # wbits 31: gzip container
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.compress(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._compressor.process(data)
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class CompressionMiddleware:
+    """Negotiated gzip/brotli compression of response bodies
+
+    Bodies below minimum_size, responses that already carry a Content-Encoding,
+    media types outside COMPRESSIBLE_TYPES and paths under exclude_paths are sent as is.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+        exclude_paths: Sequence[str] = ()
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.exclude_paths = tuple(path.rstrip("/") for path in exclude_paths)
+
+    def _excluded(self, path: str) -> bool:
+        return any(path == prefix or path.startswith(prefix + "/") for prefix in self.exclude_paths)
+
+    def compressor(self, encoding: str):
+        if encoding == "br":
+            return _BrotliCompressor(self.brotli_quality)
+        return _GzipCompressor(self.gzip_level)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or self._excluded(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        await _CompressionResponder(self, encoding, send)(scope, receive)
+
+
+class _CompressionResponder:
+    """Holds back the response start until the first body chunk shows whether to compress"""
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self.send = send
+        self.start_message: Optional[Message] = None
+        self.compressor = None
+
+    async def __call__(self, scope: Scope, receive: Receive) -> None:
+        await self.middleware.app(scope, receive, self.send_wrapper)
+
+    def _compress_whole(self, body: bytes) -> bytes:
+        return self.compressor.compress(body) + self.compressor.finish()
+
+    def _compressible(self, headers: MutableHeaders, body: bytes, more_body: bool) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES):
+            return False
+        return more_body or len(body) >= self.middleware.minimum_size
+
+    async def send_wrapper(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.start_message = message
+            return
+
+        if self.start_message is None:
+            # Already decided: compress the rest of a streamed body or pass it through
+            if self.compressor is not None and message["type"] == "http.response.body":
+                more_body = message.get("more_body", False)
+                body = self.compressor.compress(message.get("body", b""))
+                if not more_body:
+                    body += self.compressor.finish()
+                message = {**message, "body": body}
+            await self.send(message)
+            return
+
+        start, self.start_message = self.start_message, None
+        if message["type"] != "http.response.body":
+            # e.g. http.response.pathsend: the server sends the file itself
+            await self.send(start)
+            await self.send(message)
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self._compressible(headers, body, more_body):
+            await self.send(start)
+            await self.send(message)
+            return
+
+        self.compressor = self.middleware.compressor(self.encoding)
+        headers["content-encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        if more_body:
+            body = self.compressor.compress(body)
+            del headers["content-length"]
+        else:
+            if len(body) >= THREAD_OFFLOAD_SIZE:
+                body = await anyio.to_thread.run_sync(self._compress_whole, body)
+            else:
+                body = self._compress_whole(body)
+            headers["content-length"] = str(len(body))
+        await self.send(start)
+        await self.send({**message, "body": body})
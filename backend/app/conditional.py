@@ -0,0 +1,52 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Any, Optional, Sequence
+from fastapi import Request, Response
+
+# Clients must revalidate, and shared caches must not serve one user's copy to another
+CACHE_CONTROL = "private, no-cache"
+
+
+def _timestamp(moment: datetime) -> float:
+    # SQLite returns naive datetimes; its CURRENT_TIMESTAMP is UTC
+    return (moment if moment.tzinfo else moment.replace(tzinfo=timezone.utc)).timestamp()
+
+
+def make_etag(request: Request, validators: Sequence[Any]) -> str:
+    """Weak ETag over the request's query and the validators of the data it reads"""
+    payload = "|".join([request.url.path, str(request.url.query), *map(repr, validators)])
+    return f'W/"{hashlib.sha1(payload.encode()).hexdigest()}"'
+
+
+def not_modified(
+    request: Request,
+    response: Response,
+    validators: Sequence[Any],
+    last_modified: Optional[datetime] = None
+) -> Optional[Response]:
+    """Set ETag and Last-Modified on response; return a 304 response when the client's copy is current"""
+    headers = {"etag": make_etag(request, validators), "cache-control": CACHE_CONTROL, "vary": "Authorization"}
+    if last_modified is not None:
+        headers["last-modified"] = formatdate(_timestamp(last_modified), usegmt=True)
+    response.headers.update(headers)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        current = if_none_match.strip() == "*" or headers["etag"].removeprefix("W/") in tags
+    elif last_modified is not None and "if-modified-since" in request.headers:
+        try:
+            since = parsedate_to_datetime(request.headers["if-modified-since"])
+        except (TypeError, ValueError):
+            return None
+        current = int(_timestamp(last_modified)) <= _timestamp(since)
+    else:
+        current = False
+    return Response(status_code=304, headers=headers) if current else None
+
+
+def latest(*moments: Optional[datetime]) -> Optional[datetime]:
+    """Most recent of several optional timestamps"""
+    present = [moment for moment in moments if moment is not None]
+    return max(present, key=_timestamp) if present else None
@@ -1,11 +1,144 @@
+import threading
+import time
+from typing import Optional
+from uuid import uuid4
 from sqlalchemy import create_engine
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
 from .config import settings
 
-engine = create_engine(settings.database_url)
+# Async drivers for the sync database URL schemes we support
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Dialect insert() constructs supporting INSERT ... ON CONFLICT
+UPSERT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+
+def upsert_insert(db):
+    """insert() with on_conflict_do_update/on_conflict_do_nothing for the session's database"""
+    return UPSERT_INSERTS[db.get_bind().dialect.name]
+
+
+def get_async_database_url(url: Optional[str] = None) -> str:
+    """Async driver URL for the configured database"""
+    if settings.async_database_url:
+        return settings.async_database_url
+    url = url or settings.database_url
+    scheme, _, rest = url.partition("://")
+    return f"{ASYNC_DRIVERS.get(scheme, scheme)}://{rest}"
+
+
+class _PoolWaitMetrics:
+    """Records how long checkouts wait for a connection and how many time out"""
+
+    def _init_metrics(self):
+        self._metrics_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _timed_get(self, do_get):
+        start = time.perf_counter()
+        try:
+            return do_get()
+        except PoolTimeoutError:
+            with self._metrics_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            with self._metrics_lock:
+                self.checkouts += 1
+                self.total_wait += waited
+                self.max_wait = max(self.max_wait, waited)
+
+
+class TimedQueuePool(_PoolWaitMetrics, QueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_metrics()
+
+    def _do_get(self):
+        return self._timed_get(super()._do_get)
+
+
+class TimedAsyncAdaptedQueuePool(_PoolWaitMetrics, AsyncAdaptedQueuePool):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._init_metrics()
+
+    def _do_get(self):
+        return self._timed_get(super()._do_get)
+
+
+def _engine_options(url: str, async_driver: bool = False) -> dict:
+    if url.startswith("sqlite"):
+        # SQLite picks its own pool; sizing options do not apply
+        return {}
+    if settings.db_pgbouncer_mode:
+        # PgBouncer in transaction mode owns the pooling. Server-side prepared
+        # statements cannot be shared across its backends, so disable caching
+        # them and give each one a unique name.
+        options = {"poolclass": NullPool}
+        if async_driver:
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            }
+        return options
+    return {
+        "poolclass": TimedAsyncAdaptedQueuePool if async_driver else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def pool_stats(pool) -> dict:
+    """Live gauges for a connection pool"""
+    stats = {"pool_class": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow,
+        })
+    if isinstance(pool, _PoolWaitMetrics):
+        with pool._metrics_lock:
+            stats.update({
+                "checkouts": pool.checkouts,
+                "timeouts": pool.timeouts,
+                "avg_wait_ms": pool.total_wait / pool.checkouts * 1000 if pool.checkouts else 0.0,
+                "max_wait_ms": pool.max_wait * 1000,
+            })
+    return stats
+
+
+engine = create_engine(settings.database_url, **_engine_options(settings.database_url))
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_engine(
+    get_async_database_url(), **_engine_options(get_async_database_url(), async_driver=True)
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -14,4 +147,9 @@ def get_db():
     try:
         yield db
     finally:
-        db.close() 
\ No newline at end of file
+        db.close()
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,66 @@
+from typing import Iterable, Optional
+from sqlalchemy import inspect
+from sqlalchemy.orm import selectinload, joinedload, raiseload, load_only
+from . import models, schemas
+from .config import settings
+
+LOADER_STRATEGIES = {
+    "selectin": selectinload,
+    "joined": joinedload,
+}
+
+
+def _loader(strategy: Optional[str]):
+    strategy = strategy or settings.relationship_loader
+    try:
+        return LOADER_STRATEGIES[strategy]
+    except KeyError:
+        raise ValueError(f"Unknown relationship loader strategy: {strategy}")
+
+
+def _lazy_load_guard():
+    # Any relationship not loaded up front raises instead of issuing a query
+    return [raiseload("*")] if settings.raise_on_lazy_load else []
+
+
+def analysis_options(strategy: Optional[str] = None):
+    """Loader options for queries serialized as AnalysisResponse"""
+    loader = _loader(strategy)
+    return [
+        loader(models.Analysis.author),
+        loader(models.Analysis.images),
+        loader(models.Analysis.tags),
+        *_lazy_load_guard(),
+    ]
+
+
+def analysis_fields_options(fields: Iterable[str], strategy: Optional[str] = None):
+    """Loader options for queries serialized with a sparse fieldset: only the requested columns and relationships"""
+    loader = _loader(strategy)
+    fields = set(fields)
+    columns = {"id", "created_at", *fields}  # Cursor keys are always loaded
+    if "author" in fields:
+        columns.add("author_id")
+    
+    options = [load_only(*(
+        getattr(models.Analysis, name) for name in inspect(models.Analysis).column_attrs.keys() if name in columns
+    ))]
+    if "author" in fields:
+        options.append(loader(models.Analysis.author).load_only(
+            *(getattr(models.User, name) for name in schemas.AuthorSummary.model_fields)
+        ))
+    if "images" in fields:
+        options.append(loader(models.Analysis.images))
+    if "tags" in fields:
+        options.append(loader(models.Analysis.tags))
+    return [*options, *_lazy_load_guard()]
+
+
+def subscription_options(strategy: Optional[str] = None):
+    """Loader options for queries serialized as SubscriptionResponse"""
+    loader = _loader(strategy)
+    return [
+        loader(models.Subscription.creator),
+        loader(models.Subscription.subscriber),
+        *_lazy_load_guard(),
+    ]
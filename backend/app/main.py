@@ -1,12 +1,20 @@
-from fastapi import FastAPI, HTTPException
+import secrets
+from contextlib import asynccontextmanager
+from typing import Optional
+from fastapi import FastAPI, Header, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, ORJSONResponse
 import os
-from .api import auth, users, analyses, subscriptions
-from .database import engine
+from .api import auth, users, analyses, subscriptions, tickers, tags, feed
+from .database import engine, async_engine, AsyncSessionLocal, pool_stats
 from . import models
 from .config import settings
+from .body_limit import BodyLimitMiddleware
+from .compression import CompressionMiddleware
+from .pagination import NEXT_CURSOR_HEADER
+from .static import UploadStaticFiles
+from .services.ticker_service import TickerService
+from .stripe_client import get_stripe_client, close_stripe_client
 
 # Create database tables
 models.Base.metadata.create_all(bind=engine)
@@ -14,12 +22,38 @@ models.Base.metadata.create_all(bind=engine)
 # Create uploads directory
 os.makedirs(settings.upload_dir, exist_ok=True)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm in-memory indexes before serving traffic
+    async with AsyncSessionLocal() as db:
+        await TickerService.load(db)
+    # Stripe connections are pooled for the lifetime of this event loop
+    get_stripe_client()
+    yield
+    await close_stripe_client()
+
+
 app = FastAPI(
     title="Social Finance API",
     description="A social finance platform for stock analysis and subscriptions",
-    version="1.0.0"
+    version="1.0.0",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
+# Compress JSON responses for clients that accept gzip or brotli
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.compression_minimum_size,
+    gzip_level=settings.compression_gzip_level,
+    brotli_quality=settings.compression_brotli_quality,
+    exclude_paths=settings.compression_exclude_paths,
+)
+
+# Refuse oversized uploads before they are spooled to disk
+app.add_middleware(BodyLimitMiddleware, max_body_size=settings.max_request_size)
+
 # CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -27,16 +61,20 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 # Mount static files for uploaded images
-app.mount("/uploads", StaticFiles(directory=settings.upload_dir), name="uploads")
+app.mount("/uploads", UploadStaticFiles(directory=settings.upload_dir), name="uploads")
 
 # Include routers
 app.include_router(auth.router, prefix="/api/v1")
 app.include_router(users.router, prefix="/api/v1")
 app.include_router(analyses.router, prefix="/api/v1")
 app.include_router(subscriptions.router, prefix="/api/v1")
+app.include_router(tickers.router, prefix="/api/v1")
+app.include_router(tags.router, prefix="/api/v1")
+app.include_router(feed.router, prefix="/api/v1")
 
 
 @app.get("/")
@@ -46,4 +84,17 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    return {"status": "healthy"} 
\ No newline at end of file
+    return {"status": "healthy"} 
+
+
+@app.get("/health/db-pool", include_in_schema=False)
+async def db_pool_health(x_internal_token: Optional[str] = Header(None)):
+    """Connection pool gauges for sizing pools per replica, for callers holding db_pool_stats_token"""
+    expected = settings.db_pool_stats_token
+    if not expected or not x_internal_token or not secrets.compare_digest(x_internal_token, expected):
+        # Indistinguishable from a missing route, so the endpoint is not advertised
+        raise HTTPException(status_code=404, detail="Not Found")
+    return {
+        "sync": pool_stats(engine.pool),
+        "async": pool_stats(async_engine.sync_engine.pool),
+    }
@@ -1,7 +1,35 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, Table
-from sqlalchemy.orm import relationship
+import os
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, Boolean, ForeignKey, Table, Index, JSON
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred, validates
 from sqlalchemy.sql import func
 from .database import Base
+from .config import settings
+from .storage import get_storage
+
+
+def normalize_ticker(symbol):
+    """Canonical form of a ticker symbol: trimmed and upper case, None when blank"""
+    if symbol is None:
+        return None
+    return symbol.strip().upper() or None
+
+
+def normalize_tag(name):
+    """Canonical form of a tag name: lower case with single spaces, None when blank"""
+    return " ".join(name.split()).lower() or None
+
+
+def make_excerpt(content, length=None):
+    """Plain-text preview of analysis content, cut at a word boundary"""
+    text = " ".join((content or "").split())
+    length = length or settings.excerpt_length
+    if len(text) <= length:
+        return text
+    cut = text[:length - 1]
+    if text[length - 1] != " ":
+        cut = cut.rsplit(" ", 1)[0] or cut
+    return cut.rstrip(" .,;:") + "…"
 
 
 # Association table for many-to-many relationship between analyses and tags
@@ -9,7 +37,9 @@ analysis_tags = Table(
     'analysis_tags',
     Base.metadata,
     Column('analysis_id', Integer, ForeignKey('analyses.id')),
-    Column('tag_id', Integer, ForeignKey('tags.id'))
+    Column('tag_id', Integer, ForeignKey('tags.id')),
+    Index('ix_analysis_tags_analysis_id', 'analysis_id'),
+    Index('ix_analysis_tags_tag_id_analysis_id', 'tag_id', 'analysis_id')
 )
 
 
@@ -25,13 +55,16 @@ class User(Base):
     profile_image = Column(String)
     is_verified = Column(Boolean, default=False)
     monthly_fee = Column(Float, default=0.0)  # Monthly subscription fee
+    stripe_customer_id = Column(String, unique=True)  # Created on first subscribe
+    profile_version = Column(Integer, nullable=False, default=1, server_default="1")  # Bumped on profile updates
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), index=True)
     
     # Relationships
     analyses = relationship("Analysis", back_populates="author")
     subscriptions = relationship("Subscription", foreign_keys="Subscription.subscriber_id", back_populates="subscriber")
     subscribers = relationship("Subscription", foreign_keys="Subscription.creator_id", back_populates="creator")
+    stats = relationship("AnalystStats", back_populates="user", uselist=False)
 
 
 class Analysis(Base):
@@ -40,6 +73,7 @@ class Analysis(Base):
     id = Column(Integer, primary_key=True, index=True)
     title = Column(String, nullable=False)
     content = Column(Text, nullable=False)
+    excerpt = Column(String)  # Derived from content on write, served by list views
     target_price = Column(Float, nullable=False)
     current_price = Column(Float)
     time_horizon = Column(String, nullable=False)  # e.g., "3 months", "1 year"
@@ -47,12 +81,38 @@ class Analysis(Base):
     success_status = Column(String, default="pending")  # pending, success, failed
     author_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    fanned_out = Column(Boolean, nullable=False, default=False, server_default="false")  # Copied into subscriber timelines
+    # Weighted title/content document, maintained by SearchService on PostgreSQL only
+    search_vector = deferred(Column(TSVECTOR().with_variant(Text(), "sqlite")))
     
     # Relationships
     author = relationship("User", back_populates="analyses")
     images = relationship("AnalysisImage", back_populates="analysis")
     tags = relationship("Tag", secondary=analysis_tags, back_populates="analyses")
+    
+    @validates("ticker_symbol")
+    def validate_ticker_symbol(self, key, value):
+        return normalize_ticker(value)
+    
+    @validates("content")
+    def validate_content(self, key, value):
+        self.excerpt = make_excerpt(value)
+        return value
+    
+    __table_args__ = (
+        Index("ix_analyses_created_at_id", created_at, id),
+        Index("ix_analyses_author_id_created_at", author_id, created_at, id),
+        Index("ix_analyses_ticker_symbol_created_at", ticker_symbol, created_at, id),
+        Index("ix_analyses_author_id_success_status", author_id, success_status),
+        Index("ix_analyses_updated_at", updated_at),
+        Index("ix_analyses_search_vector", search_vector, postgresql_using="gin"),
+        # Analyses of creators too large to fan out, merged into feeds at read time
+        Index(
+            "ix_analyses_pull_author_id_created_at", author_id, created_at, id,
+            postgresql_where=fanned_out.is_(False), sqlite_where=fanned_out.is_(False)
+        ),
+    )
 
 
 class AnalysisImage(Base):
@@ -60,12 +120,46 @@ class AnalysisImage(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     analysis_id = Column(Integer, ForeignKey("analyses.id"), nullable=False)
-    image_path = Column(String, nullable=False)
+    image_path = Column(String, nullable=False)  # Storage key, or a file path for images uploaded before blob storage
+    blob_digest = Column(String(64), ForeignKey("stored_blobs.digest"))
     caption = Column(String)
+    variants = Column(JSON)  # Variant name -> storage key of the resized copy
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     # Relationships
     analysis = relationship("Analysis", back_populates="images")
+    
+    def _url(self, key):
+        if self.blob_digest is None:
+            return "/uploads/" + os.path.relpath(key, settings.upload_dir).replace(os.sep, "/")
+        return get_storage().url(key)
+    
+    @property
+    def url(self):
+        """Public URL of the image"""
+        return self._url(self.image_path)
+    
+    @property
+    def variant_urls(self):
+        """Public URLs of the generated variants"""
+        return {name: self._url(key) for name, key in (self.variants or {}).items()}
+    
+    __table_args__ = (
+        Index("ix_analysis_images_analysis_id", analysis_id),
+        Index("ix_analysis_images_blob_digest", blob_digest),
+    )
+
+
+class StoredBlob(Base):
+    """Uploaded content stored once per sha256 digest and shared by every image that uses it"""
+    __tablename__ = "stored_blobs"
+    
+    digest = Column(String(64), primary_key=True)
+    path = Column(String, nullable=False)  # Storage key
+    size = Column(Integer, nullable=False)
+    content_type = Column(String)
+    ref_count = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
 
 class Tag(Base):
@@ -79,6 +173,17 @@ class Tag(Base):
     analyses = relationship("Analysis", secondary=analysis_tags, back_populates="tags")
 
 
+class StripePrice(Base):
+    """Stripe Price minted for one monthly fee of a creator, reused by every subscriber at that fee"""
+    __tablename__ = "stripe_prices"
+    
+    creator_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+    unit_amount = Column(Integer, primary_key=True)  # Monthly fee in cents
+    stripe_price_id = Column(String, unique=True, nullable=False)
+    stripe_product_id = Column(String, nullable=False)  # One product per creator, shared by its prices
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
 class Subscription(Base):
     __tablename__ = "subscriptions"
     
@@ -95,6 +200,47 @@ class Subscription(Base):
     # Relationships
     subscriber = relationship("User", foreign_keys=[subscriber_id], back_populates="subscriptions")
     creator = relationship("User", foreign_keys=[creator_id], back_populates="subscribers")
+    
+    __table_args__ = (
+        Index("ix_subscriptions_subscriber_id_creator_id_status", subscriber_id, creator_id, status),
+        Index("ix_subscriptions_creator_id_status", creator_id, status),
+    )
+
+
+class TimelineEntry(Base):
+    """An analysis materialized into a subscriber's feed when it was published"""
+    __tablename__ = "timeline_entries"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    analysis_id = Column(Integer, ForeignKey("analyses.id", ondelete="CASCADE"), primary_key=True)
+    author_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)  # Of the analysis, for keyset pagination
+    
+    __table_args__ = (
+        Index("ix_timeline_entries_user_id_created_at", user_id, created_at, analysis_id),
+    )
+
+
+class AnalystStats(Base):
+    """Precomputed per-analyst statistics backing the ranked leaderboard"""
+    __tablename__ = "analyst_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_analyses = Column(Integer, nullable=False, default=0)
+    success_count = Column(Integer, nullable=False, default=0)
+    success_rate = Column(Float, nullable=False, default=0.0)  # 0 when the analyst has no analyses
+    subscriber_count = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    
+    # Relationships
+    user = relationship("User", back_populates="stats")
+    
+    __table_args__ = (
+        Index("ix_analyst_stats_success_rate", success_rate.desc(), user_id.desc()),
+        Index("ix_analyst_stats_subscriber_count", subscriber_count.desc(), user_id.desc()),
+        Index("ix_analyst_stats_total_analyses", total_analyses.desc(), user_id.desc()),
+        Index("ix_analyst_stats_updated_at", updated_at),
+    )
 
 
 class PaymentHistory(Base):
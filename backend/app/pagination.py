@@ -0,0 +1,57 @@
+import base64
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence
+from fastapi import HTTPException, Response
+from sqlalchemy import tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Encode the sort key of the last row of a page as an opaque cursor"""
+    payload = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> List[Any]:
+    """Decode a cursor back into values typed like the given columns"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise ValueError("cursor does not match sort key")
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            values.append(python_type.fromisoformat(value) if python_type is datetime else python_type(value))
+        return values
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_cursor(query, columns: Sequence, cursor: Optional[str], descending: bool = True):
+    """Order a query by columns and seek past the cursor position (keyset pagination)"""
+    if cursor:
+        key = tuple_(*columns)
+        position = tuple_(*decode_cursor(cursor, columns))
+        query = query.filter(key < position if descending else key > position)
+    return query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+
+async def fetch_page(
+    db: AsyncSession,
+    statement,
+    limit: int,
+    response: Response,
+    key: Callable[[Any], Sequence[Any]],
+    scalars: bool = True
+) -> list:
+    """Fetch one page and expose the cursor of the next one in a response header"""
+    result = await db.execute(statement.limit(limit + 1))
+    rows = result.unique().scalars().all() if scalars else result.all()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(key(rows[-1]))
+    return rows
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr
-from typing import Optional, List
+from typing import Optional, List, Dict
 from datetime import datetime
 
 
@@ -25,6 +25,7 @@ class UserUpdate(BaseModel):
 
 
 class UserResponse(UserBase):
+    email: str  # Validated on the way in; re-checking stored addresses dominates serialization cost
     id: int
     is_verified: bool
     created_at: datetime
@@ -61,6 +62,7 @@ class AnalysisUpdate(BaseModel):
     current_price: Optional[float] = None
     time_horizon: Optional[str] = None
     ticker_symbol: Optional[str] = None
+    tags: Optional[List[str]] = None  # Replaces all tags when given
 
 
 class AnalysisResponse(AnalysisBase):
@@ -77,6 +79,45 @@ class AnalysisResponse(AnalysisBase):
         from_attributes = True
 
 
+class AuthorSummary(BaseModel):
+    id: int
+    username: str
+    full_name: Optional[str] = None
+    profile_image: Optional[str] = None
+    
+    class Config:
+        from_attributes = True
+
+
+class AnalysisSummary(BaseModel):
+    """List view of an analysis: an excerpt instead of content, no images or tags"""
+    id: int
+    title: str
+    excerpt: Optional[str] = None
+    target_price: float
+    current_price: Optional[float] = None
+    time_horizon: str
+    ticker_symbol: Optional[str] = None
+    success_status: str
+    author_id: int
+    created_at: datetime
+    author: AuthorSummary
+    
+    class Config:
+        from_attributes = True
+
+
+class AnalysisSearchResult(AnalysisResponse):
+    rank: float = 0
+    headline: Optional[str] = None  # Content excerpt with matches wrapped in <b></b>
+
+
+# Ticker schemas
+class TickerSuggestion(BaseModel):
+    symbol: str
+    analysis_count: int
+
+
 # Analysis Image schemas
 class AnalysisImageBase(BaseModel):
     caption: Optional[str] = None
@@ -90,6 +131,8 @@ class AnalysisImageResponse(AnalysisImageBase):
     id: int
     analysis_id: int
     image_path: str
+    url: str
+    variant_urls: Dict[str, str] = {}
     created_at: datetime
     
     class Config:
@@ -113,6 +156,10 @@ class TagResponse(TagBase):
         from_attributes = True
 
 
+class TagCount(TagBase):
+    analysis_count: int
+
+
 # Subscription schemas
 class SubscriptionBase(BaseModel):
     creator_id: int
@@ -162,10 +209,13 @@ class Token(BaseModel):
 
 class TokenData(BaseModel):
     username: Optional[str] = None
+    user_id: Optional[int] = None
+    version: Optional[int] = None
 
 
 # Update forward references
 AnalysisResponse.model_rebuild()
+AnalysisSearchResult.model_rebuild()
 AnalysisImageResponse.model_rebuild()
 TagResponse.model_rebuild()
 SubscriptionResponse.model_rebuild() 
\ No newline at end of file
@@ -0,0 +1,61 @@
+from functools import lru_cache
+from typing import Any, List, Optional, Tuple
+from fastapi import HTTPException, Response
+from pydantic import ConfigDict, TypeAdapter, create_model
+from . import schemas
+
+# Built once: constructing a TypeAdapter compiles its validator and serializer
+ANALYSIS_LIST = TypeAdapter(List[schemas.AnalysisResponse])
+USER_WITH_STATS_LIST = TypeAdapter(List[schemas.UserWithStats])
+SUBSCRIPTION_LIST = TypeAdapter(List[schemas.SubscriptionResponse])
+ANALYSIS_SUMMARY_LIST = TypeAdapter(List[schemas.AnalysisSummary])
+
+# Fields selectable with ?fields=; nested authors take their summary shape
+SUMMARY = "summary"
+SUMMARY_FIELDS = frozenset(schemas.AnalysisSummary.model_fields)
+ANALYSIS_FIELDS = {**schemas.AnalysisResponse.model_fields, **schemas.AnalysisSummary.model_fields}
+
+
+def parse_analysis_fields(fields: Optional[str]) -> Optional[Tuple[str, ...]]:
+    """Requested analysis fields in a canonical order, None for the full representation
+
+    "summary" expands to the fields of AnalysisSummary and may be combined with others.
+    """
+    names = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    if not names:
+        return None
+    if SUMMARY in names:
+        names = (names - {SUMMARY}) | SUMMARY_FIELDS
+    unknown = names - ANALYSIS_FIELDS.keys()
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(name for name in ANALYSIS_FIELDS if name in names)
+
+
+@lru_cache(maxsize=128)
+def analysis_fields_adapter(fields: Tuple[str, ...]) -> TypeAdapter:
+    """List adapter serializing only the given analysis fields, built once per fieldset"""
+    if SUMMARY_FIELDS.issuperset(fields) and len(fields) == len(SUMMARY_FIELDS):
+        return ANALYSIS_SUMMARY_LIST
+    model = create_model(
+        "AnalysisFields",
+        __config__=ConfigDict(from_attributes=True),
+        **{name: (ANALYSIS_FIELDS[name].annotation, ANALYSIS_FIELDS[name]) for name in fields}
+    )
+    return TypeAdapter(List[model])
+
+
+def json_response(adapter: TypeAdapter, items: Any, response: Optional[Response] = None) -> Response:
+    """Validate ORM objects or result rows by attribute and encode them straight to JSON bytes
+
+    Skips FastAPI's response_model round trip through Python dicts; headers already
+    set on the injected response (cursors, validators) are carried over.
+    """
+    headers = None
+    if response is not None:
+        headers = {name: value for name, value in response.headers.items() if name != "content-length"}
+    return Response(
+        content=adapter.dump_json(adapter.validate_python(items, from_attributes=True)),
+        media_type="application/json",
+        headers=headers
+    )
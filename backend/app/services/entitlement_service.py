@@ -0,0 +1,111 @@
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from ..cache import TTLCache, redis_get, redis_set, redis_delete
+from ..config import settings
+
+_local_cache = TTLCache(
+    maxsize=settings.entitlement_cache_size,
+    ttl=settings.entitlement_local_ttl_seconds
+)
+# Keys whose Redis invalidation failed; read from the database until a fresh value overwrites the stale one
+_stale_in_redis = TTLCache(
+    maxsize=settings.entitlement_cache_size,
+    ttl=settings.entitlement_cache_ttl_seconds
+)
+
+
+def _cache_key(subscriber_id: int, creator_id: int) -> str:
+    return f"entitlement:{subscriber_id}:{creator_id}"
+
+
+def _seconds_until(moment: Optional[datetime]) -> Optional[float]:
+    if moment is None:
+        return None
+    now = datetime.now(timezone.utc) if moment.tzinfo else datetime.now()
+    return (moment - now).total_seconds()
+
+
+def _active_subscription_statement(subscriber_id: int, creator_id: int):
+    return select(models.Subscription).where(
+        models.Subscription.subscriber_id == subscriber_id,
+        models.Subscription.creator_id == creator_id,
+        models.Subscription.status == "active"
+    ).limit(1)
+
+
+def _get_cached(key: str) -> Optional[bool]:
+    cached = _local_cache.get(key)
+    if cached is not None:
+        return cached
+    if _stale_in_redis.get(key):
+        return None
+
+    cached = redis_get(key)
+    if cached is not None:
+        cached = cached == "1"
+        _local_cache.set(key, cached)
+    return cached
+
+
+def _store(key: str, subscription: Optional[models.Subscription]) -> bool:
+    if subscription:
+        ttl = settings.entitlement_cache_ttl_seconds
+        # Never cache access beyond the paid period
+        remaining = _seconds_until(subscription.current_period_end)
+        if remaining is not None:
+            ttl = min(ttl, int(remaining))
+    else:
+        ttl = settings.entitlement_negative_ttl_seconds
+
+    is_subscribed = subscription is not None
+    _local_cache.set(key, is_subscribed, ttl)
+    if redis_set(key, "1" if is_subscribed else "0", ttl):
+        _stale_in_redis.delete(key)
+    return is_subscribed
+
+
+def _invalidate(key: str) -> None:
+    _local_cache.delete(key)
+    if not redis_delete(key):
+        _stale_in_redis.set(key, True)
+
+
+class EntitlementService:
+    @staticmethod
+    def is_subscribed(db: Session, subscriber_id: int, creator_id: int) -> bool:
+        """Check for an active subscription, via the in-process LRU, then Redis, then the database"""
+        key = _cache_key(subscriber_id, creator_id)
+        cached = _get_cached(key)
+        if cached is not None:
+            return cached
+
+        subscription = db.scalars(_active_subscription_statement(subscriber_id, creator_id)).first()
+        return _store(key, subscription)
+
+    @staticmethod
+    async def is_subscribed_async(db: AsyncSession, subscriber_id: int, creator_id: int) -> bool:
+        """Async variant of is_subscribed; Redis calls run in the threadpool"""
+        key = _cache_key(subscriber_id, creator_id)
+        cached = _local_cache.get(key)
+        if cached is None:
+            cached = await run_in_threadpool(_get_cached, key)
+        if cached is not None:
+            return cached
+
+        subscription = (await db.scalars(_active_subscription_statement(subscriber_id, creator_id))).first()
+        return await run_in_threadpool(_store, key, subscription)
+
+    @staticmethod
+    def invalidate(subscriber_id: int, creator_id: int) -> None:
+        """Drop cached entitlement after a subscription status change"""
+        _invalidate(_cache_key(subscriber_id, creator_id))
+
+    @staticmethod
+    async def invalidate_async(subscriber_id: int, creator_id: int) -> None:
+        """Async variant of invalidate; the Redis call runs in the threadpool"""
+        await run_in_threadpool(_invalidate, _cache_key(subscriber_id, creator_id))
@@ -0,0 +1,118 @@
+from typing import List, Optional, Tuple
+from sqlalchemy import delete, func, literal, select, true, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models, loaders
+from ..config import settings
+from ..database import upsert_insert
+from ..pagination import decode_cursor, encode_cursor
+
+
+def _active_creator_ids(subscriber_id: int):
+    return select(models.Subscription.creator_id).filter(
+        models.Subscription.subscriber_id == subscriber_id,
+        models.Subscription.status == "active"
+    )
+
+
+class FeedService:
+    @staticmethod
+    def fan_out(db: Session, analysis: models.Analysis) -> None:
+        """Copy a new analysis into the timeline of every active subscriber of its author"""
+        subscribers = select(models.Subscription.subscriber_id).filter(
+            models.Subscription.creator_id == analysis.author_id,
+            models.Subscription.status == "active"
+        ).distinct()
+        
+        subscriber_count = db.scalar(
+            select(func.count()).select_from(subscribers.limit(settings.feed_fanout_max_subscribers + 1).subquery())
+        )
+        if subscriber_count > settings.feed_fanout_max_subscribers:
+            # Left to fan-out-on-read, see _pulled_statement
+            return
+        
+        created_at = select(models.Analysis.created_at).filter(models.Analysis.id == analysis.id).scalar_subquery()
+        db.execute(
+            upsert_insert(db)(models.TimelineEntry).from_select(
+                ["user_id", "analysis_id", "author_id", "created_at"],
+                select(
+                    subscribers.subquery().c.subscriber_id,
+                    literal(analysis.id),
+                    literal(analysis.author_id),
+                    created_at
+                ).where(true())  # SQLite needs a WHERE before ON CONFLICT in INSERT ... SELECT
+            ).on_conflict_do_nothing()
+        )
+        db.execute(update(models.Analysis).filter(models.Analysis.id == analysis.id).values(fanned_out=True))
+    
+    @staticmethod
+    def backfill(db: Session, subscriber_id: int, creator_id: int) -> None:
+        """Copy a creator's recent fanned-out analyses into a new subscriber's timeline"""
+        recent = select(
+            literal(subscriber_id), models.Analysis.id, models.Analysis.author_id, models.Analysis.created_at
+        ).filter(
+            models.Analysis.author_id == creator_id,
+            models.Analysis.fanned_out.is_(True)
+        ).order_by(models.Analysis.created_at.desc()).limit(settings.feed_backfill_size)
+        db.execute(
+            upsert_insert(db)(models.TimelineEntry).from_select(
+                ["user_id", "analysis_id", "author_id", "created_at"], recent
+            ).on_conflict_do_nothing()
+        )
+    
+    @staticmethod
+    def remove_analysis(db: Session, analysis_id: int) -> None:
+        # The foreign key cascades on PostgreSQL; SQLite does not enforce it by default
+        db.execute(delete(models.TimelineEntry).filter(models.TimelineEntry.analysis_id == analysis_id))
+    
+    @staticmethod
+    async def feed(
+        db: AsyncSession,
+        user_id: int,
+        limit: int,
+        cursor: Optional[str] = None,
+        options: Optional[list] = None
+    ) -> Tuple[List[models.Analysis], Optional[str]]:
+        """Newest analyses from creators the user actively subscribes to, and the cursor of the next page
+
+        options replaces the default loader options, e.g. for a sparse fieldset.
+        """
+        position = decode_cursor(cursor, [models.Analysis.created_at, models.Analysis.id]) if cursor else None
+        
+        # Pushed: the user's timeline, restricted to creators still subscribed to
+        pushed = select(models.TimelineEntry.created_at, models.TimelineEntry.analysis_id).filter(
+            models.TimelineEntry.user_id == user_id,
+            models.TimelineEntry.author_id.in_(_active_creator_ids(user_id))
+        )
+        if position:
+            pushed = pushed.filter(tuple_(models.TimelineEntry.created_at, models.TimelineEntry.analysis_id) < tuple_(*position))
+        pushed = pushed.order_by(
+            models.TimelineEntry.created_at.desc(), models.TimelineEntry.analysis_id.desc()
+        ).limit(limit + 1)
+        
+        # Pulled: analyses of creators that were too large to fan out when they published
+        pulled = select(models.Analysis.created_at, models.Analysis.id).filter(
+            models.Analysis.author_id.in_(_active_creator_ids(user_id)),
+            models.Analysis.fanned_out.is_(False)
+        )
+        if position:
+            pulled = pulled.filter(tuple_(models.Analysis.created_at, models.Analysis.id) < tuple_(*position))
+        pulled = pulled.order_by(models.Analysis.created_at.desc(), models.Analysis.id.desc()).limit(limit + 1)
+        
+        # A creator may have crossed the fan-out threshold, so the two sides can overlap
+        keys = sorted(
+            {tuple(row) for statement in (pushed, pulled) for row in (await db.execute(statement)).all()},
+            reverse=True
+        )
+        next_cursor = encode_cursor(keys[limit - 1]) if len(keys) > limit else None
+        keys = keys[:limit]
+        if not keys:
+            return [], None
+        
+        analyses = (await db.scalars(
+            select(models.Analysis).options(*(options or loaders.analysis_options())).filter(
+                models.Analysis.id.in_([analysis_id for _, analysis_id in keys])
+            )
+        )).unique().all()
+        by_id = {analysis.id: analysis for analysis in analyses}
+        return [by_id[analysis_id] for _, analysis_id in keys if analysis_id in by_id], next_cursor
@@ -0,0 +1,121 @@
+import logging
+import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from PIL import Image, ImageOps
+from sqlalchemy import func, update
+from .. import models
+from ..config import settings
+from ..database import SessionLocal
+from ..storage import UPLOAD_TEMP_DIR, get_storage
+
+logger = logging.getLogger(__name__)
+
+# name: (maximum width/height, Pillow format, file extension)
+IMAGE_VARIANTS = {
+    "thumbnail": (320, "JPEG", "jpg"),
+    "medium": (1024, "JPEG", "jpg"),
+    "thumbnail_webp": (320, "WEBP", "webp"),
+    "medium_webp": (1024, "WEBP", "webp"),
+}
+
+_image_executor: Optional[ProcessPoolExecutor] = None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _image_executor
+    if _image_executor is None:
+        _image_executor = ProcessPoolExecutor(max_workers=settings.image_workers)
+    return _image_executor
+
+
+def variant_key(key: str, name: str) -> str:
+    """Storage key of a variant, stored alongside the original"""
+    extension = IMAGE_VARIANTS[name][2]
+    return f"{os.path.splitext(key)[0]}_{name}.{extension}"
+
+
+def variant_keys(key: str) -> List[str]:
+    return [variant_key(key, name) for name in IMAGE_VARIANTS]
+
+
+def _prepare(image: Image.Image, image_format: str) -> Image.Image:
+    if image_format == "JPEG" and image.mode != "RGB":
+        # JPEG has no alpha channel, flatten onto white
+        background = Image.new("RGB", image.size, (255, 255, 255))
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        return background
+    if image_format == "WEBP" and image.mode not in ("RGB", "RGBA"):
+        return image.convert("RGBA")
+    return image
+
+
+def generate_variants(source_path: str, output_dir: str) -> Dict[str, str]:
+    """Write resized variants of an image into output_dir; runs in a worker process"""
+    variants = {}
+    with Image.open(source_path) as original:
+        original = ImageOps.exif_transpose(original)
+        for name, (max_size, image_format, extension) in IMAGE_VARIANTS.items():
+            image = original.copy()
+            image.thumbnail((max_size, max_size), Image.LANCZOS)
+            variant_path = os.path.join(output_dir, f"{name}.{extension}")
+            _prepare(image, image_format).save(
+                variant_path, image_format, quality=settings.image_variant_quality, optimize=True
+            )
+            variants[name] = variant_path
+    return variants
+
+
+def _store_variants(key: str) -> Dict[str, str]:
+    storage = get_storage()
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    output_dir = tempfile.mkdtemp(dir=UPLOAD_TEMP_DIR)
+    try:
+        with storage.local_path(key) as source_path:
+            paths = _get_executor().submit(generate_variants, source_path, output_dir).result()
+        for name, path in paths.items():
+            storage.put(variant_key(key, name), path)
+    finally:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    return {name: variant_key(key, name) for name in paths}
+
+
+def process_image_variants(image_ids: List[int]) -> None:
+    """Generate variants for uploaded images and record them; runs as a background task"""
+    db = SessionLocal()
+    try:
+        images = db.query(models.AnalysisImage).filter(models.AnalysisImage.id.in_(image_ids)).all()
+        
+        # Content already processed for another image is not resized again
+        done = dict(db.query(models.AnalysisImage.blob_digest, models.AnalysisImage.variants).filter(
+            models.AnalysisImage.blob_digest.in_({image.blob_digest for image in images}),
+            models.AnalysisImage.variants.isnot(None)
+        ).all())
+        
+        failed = set()
+        for image in images:
+            if image.blob_digest in failed:
+                continue
+            try:
+                if image.blob_digest not in done:
+                    done[image.blob_digest] = _store_variants(image.image_path)
+                image.variants = done[image.blob_digest]
+            except OSError as e:
+                # Pillow raises OSError for files it cannot decode
+                failed.add(image.blob_digest)
+                logger.warning("Could not generate variants for image %s: %s", image.id, e)
+            except Exception:
+                failed.add(image.blob_digest)
+                logger.exception("Could not generate variants for image %s", image.id)
+        # Variant URLs are part of the analysis representation
+        db.execute(
+            update(models.Analysis)
+            .filter(models.Analysis.id.in_({image.analysis_id for image in images if image.variants}))
+            .values(updated_at=func.now())
+        )
+        db.commit()
+    finally:
+        db.close()
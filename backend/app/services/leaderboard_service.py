@@ -0,0 +1,129 @@
+from typing import Iterable, Set
+from sqlalchemy import event, select, inspect, func
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import UPSERT_INSERTS
+from .stats_service import USER_COLUMNS, stats_columns, stored_stats_columns
+
+# Columns analysts can be ranked by, highest first
+RANKINGS = {
+    "success_rate": models.AnalystStats.success_rate,
+    "subscriber_count": models.AnalystStats.subscriber_count,
+    "total_analyses": models.AnalystStats.total_analyses,
+}
+STAT_FIELDS = ("total_analyses", "success_count", "success_rate", "subscriber_count")
+
+
+def _changed(obj, *attrs) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _affected_user_ids(session: Session) -> Set[int]:
+    """Collect analysts whose statistics may have changed in this flush"""
+    user_ids = set()
+
+    for obj in session.new:
+        if isinstance(obj, models.User):
+            user_ids.add(obj.id)
+        elif isinstance(obj, models.Analysis):
+            user_ids.add(obj.author_id)
+        elif isinstance(obj, models.Subscription):
+            user_ids.add(obj.creator_id)
+
+    for obj in session.deleted:
+        if isinstance(obj, models.Analysis):
+            user_ids.add(obj.author_id)
+        elif isinstance(obj, models.Subscription):
+            user_ids.add(obj.creator_id)
+
+    for obj in session.dirty:
+        if isinstance(obj, models.Analysis) and _changed(obj, "success_status", "author_id"):
+            user_ids.add(obj.author_id)
+            user_ids.update(inspect(obj).attrs.author_id.history.deleted)
+        elif isinstance(obj, models.Subscription) and _changed(obj, "status", "creator_id"):
+            user_ids.add(obj.creator_id)
+            user_ids.update(inspect(obj).attrs.creator_id.history.deleted)
+
+    user_ids.discard(None)
+    return user_ids
+
+
+class LeaderboardService:
+    @staticmethod
+    def refresh(connection, user_ids: Iterable[int]) -> None:
+        """Recompute the stored statistics of the given analysts"""
+        user_ids = sorted(user_ids)
+        if not user_ids:
+            return
+        insert = UPSERT_INSERTS[connection.dialect.name]
+
+        # Lock the analysts' rows (creating missing ones) in a fixed order before counting: a concurrent
+        # writer for the same analyst waits here and, under READ COMMITTED, recounts after the first commits
+        connection.execute(
+            insert(models.AnalystStats)
+            .from_select(
+                ["user_id"],
+                select(models.User.id).where(models.User.id.in_(user_ids)).order_by(models.User.id)
+            )
+            .on_conflict_do_nothing(index_elements=["user_id"])
+        )
+        connection.execute(
+            select(models.AnalystStats.user_id)
+            .where(models.AnalystStats.user_id.in_(user_ids))
+            .order_by(models.AnalystStats.user_id)
+            .with_for_update()
+        )
+
+        rows = connection.execute(
+            select(models.User.id, *stats_columns()).where(models.User.id.in_(user_ids))
+        ).all()
+        if rows:
+            statement = insert(models.AnalystStats)
+            connection.execute(
+                statement.on_conflict_do_update(
+                    index_elements=["user_id"],
+                    set_={**{field: statement.excluded[field] for field in STAT_FIELDS}, "updated_at": func.now()}
+                ),
+                [
+                    {
+                        "user_id": user_id,
+                        "total_analyses": total_analyses,
+                        "success_count": success_count,
+                        "success_rate": (success_count / total_analyses * 100) if total_analyses > 0 else 0.0,
+                        "subscriber_count": subscriber_count,
+                    }
+                    for user_id, total_analyses, success_count, subscriber_count in rows
+                ]
+            )
+
+    @staticmethod
+    def rebuild(db: Session) -> None:
+        """Recompute the statistics of every analyst"""
+        user_ids = [user_id for (user_id,) in db.query(models.User.id).all()]
+        LeaderboardService.refresh(db.connection(), user_ids)
+        db.commit()
+
+    @staticmethod
+    def ranking_columns(order_by: str):
+        """Sort key of a ranking, highest first"""
+        return [RANKINGS[order_by], models.AnalystStats.user_id]
+
+    @staticmethod
+    def ranked_users_statement(order_by: str):
+        """Statement yielding rows shaped like UserWithStats plus their rank_value"""
+        return select(
+            *USER_COLUMNS,
+            *stored_stats_columns(),
+            RANKINGS[order_by].label("rank_value")
+        ).join(
+            models.AnalystStats, models.AnalystStats.user_id == models.User.id
+        )
+
+
+@event.listens_for(Session, "after_flush")
+def _update_leaderboard(session, flush_context):
+    """Keep analyst_stats in step with analysis and subscription writes"""
+    user_ids = _affected_user_ids(session)
+    if user_ids:
+        LeaderboardService.refresh(session.connection(), user_ids)
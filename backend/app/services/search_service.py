@@ -0,0 +1,222 @@
+import html
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import cast, event, func, inspect, select
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models, loaders
+from ..config import settings
+from ..database import engine
+
+# SQLite has no tsvector; search runs on a per-process inverted index instead
+USE_POSTGRES_SEARCH = engine.dialect.name == "postgresql"
+
+HEADLINE_OPTIONS = "MaxFragments=2, MaxWords=30, MinWords=10"
+TITLE_WEIGHT = 2.0  # Mirrors setweight 'A' for titles vs 'B' for content
+_WORD = re.compile(r"\w+")
+
+
+def search_document(title: Optional[str], content: Optional[str]):
+    """tsvector of an analysis, titles weighted above content"""
+    language = cast(settings.search_language, REGCONFIG)
+    return func.setweight(func.to_tsvector(language, func.coalesce(title, "")), "A").op("||")(
+        func.setweight(func.to_tsvector(language, func.coalesce(content, "")), "B")
+    )
+
+
+@event.listens_for(models.Analysis, "before_insert")
+def _index_new_analysis(mapper, connection, target):
+    if connection.dialect.name == "postgresql":
+        target.search_vector = search_document(target.title, target.content)
+
+
+@event.listens_for(models.Analysis, "before_update")
+def _reindex_analysis(mapper, connection, target):
+    if connection.dialect.name == "postgresql" and _search_fields_changed(target):
+        target.search_vector = search_document(target.title, target.content)
+
+
+def _search_fields_changed(target) -> bool:
+    state = inspect(target)
+    return any(state.attrs[attr].history.has_changes() for attr in ("title", "content"))
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return _WORD.findall((text or "").lower())
+
+
+def _highlight(content: str, terms: set, width: int = 30) -> str:
+    """Excerpt of roughly width words around the first match, matches wrapped in <b></b> like ts_headline"""
+    words = content.split()
+    first = next((i for i, word in enumerate(words) if set(_tokens(word)) & terms), 0)
+    start = max(first - width // 3, 0)
+    excerpt = []
+    for word in words[start:start + width]:
+        word = html.escape(word, quote=False)
+        excerpt.append(f"<b>{word}</b>" if set(_tokens(word)) & terms else word)
+    return " ".join(excerpt)
+
+
+class MemorySearchIndex:
+    """Inverted index over analysis titles and content, scored with weighted tf-idf"""
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._documents: Dict[int, Tuple[List[str], str]] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+    def _add(self, analysis_id: int, title: Optional[str], content: Optional[str]) -> None:
+        weights = Counter()
+        for token in _tokens(title):
+            weights[token] += TITLE_WEIGHT
+        for token in _tokens(content):
+            weights[token] += 1
+        for token, weight in weights.items():
+            self._postings[token][analysis_id] = weight
+        self._documents[analysis_id] = (list(weights), content or "")
+
+    def _remove(self, analysis_id: int) -> None:
+        tokens, _ = self._documents.pop(analysis_id, ([], ""))
+        for token in tokens:
+            self._postings[token].pop(analysis_id, None)
+
+    def load(self, rows) -> None:
+        with self._lock:
+            self._postings.clear()
+            self._documents.clear()
+            for analysis_id, title, content in rows:
+                self._add(analysis_id, title, content)
+            self.loaded = True
+
+    def update(self, analysis_id: int, title: Optional[str], content: Optional[str]) -> None:
+        with self._lock:
+            self._remove(analysis_id)
+            self._add(analysis_id, title, content)
+
+    def remove(self, analysis_id: int) -> None:
+        with self._lock:
+            self._remove(analysis_id)
+
+    def search(self, query: str) -> Dict[int, float]:
+        """Ids of analyses containing every query term, with their scores"""
+        terms = set(_tokens(query))
+        if not terms:
+            return {}
+        with self._lock:
+            postings = [self._postings.get(term, {}) for term in terms]
+            matches = set.intersection(*[set(posting) for posting in postings])
+            total = len(self._documents) or 1
+            return {
+                analysis_id: sum(
+                    (1 + math.log(posting[analysis_id])) * math.log(1 + total / len(posting))
+                    for posting in postings
+                )
+                for analysis_id in matches
+            }
+
+    def headline(self, analysis_id: int, query: str) -> str:
+        with self._lock:
+            _, content = self._documents.get(analysis_id, ([], ""))
+        return _highlight(content, set(_tokens(query)))
+
+
+memory_index = MemorySearchIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_search_changes(session, flush_context):
+    if USE_POSTGRES_SEARCH:
+        return
+    changes = session.info.setdefault("search_changes", {})
+    for obj in list(session.new) + list(session.dirty):
+        if isinstance(obj, models.Analysis):
+            changes[obj.id] = (obj.title, obj.content)
+    for obj in session.deleted:
+        if isinstance(obj, models.Analysis):
+            changes[obj.id] = None
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_search_changes(session):
+    for analysis_id, document in session.info.pop("search_changes", {}).items():
+        if document is None:
+            memory_index.remove(analysis_id)
+        else:
+            memory_index.update(analysis_id, *document)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_search_changes(session):
+    session.info.pop("search_changes", None)
+
+
+class SearchService:
+    @staticmethod
+    async def search(
+        db: AsyncSession,
+        query: str,
+        skip: int,
+        limit: int,
+        author_id: Optional[int] = None,
+        ticker_symbol: Optional[str] = None
+    ) -> List[Tuple[models.Analysis, float, str]]:
+        """Analyses matching a web-style query, best match first, with highlighted excerpts"""
+        if USE_POSTGRES_SEARCH:
+            return await SearchService._search_postgres(db, query, skip, limit, author_id, ticker_symbol)
+        return await SearchService._search_memory(db, query, skip, limit, author_id, ticker_symbol)
+
+    @staticmethod
+    def _filter(statement, author_id: Optional[int], ticker_symbol: Optional[str]):
+        if author_id:
+            statement = statement.filter(models.Analysis.author_id == author_id)
+        if ticker_symbol:
+            statement = statement.filter(models.Analysis.ticker_symbol == models.normalize_ticker(ticker_symbol))
+        return statement
+
+    @staticmethod
+    async def _search_postgres(db, query, skip, limit, author_id, ticker_symbol):
+        tsquery = func.websearch_to_tsquery(cast(settings.search_language, REGCONFIG), query)
+        rank = func.ts_rank_cd(models.Analysis.search_vector, tsquery).label("rank")
+        
+        # Rank and page on the GIN index first, so ts_headline only runs for the returned rows
+        page = SearchService._filter(
+            select(models.Analysis.id, rank).filter(models.Analysis.search_vector.op("@@")(tsquery)),
+            author_id, ticker_symbol
+        ).order_by(rank.desc(), models.Analysis.id.desc()).offset(skip).limit(limit).subquery()
+        
+        headline = func.ts_headline(
+            cast(settings.search_language, REGCONFIG), models.Analysis.content, tsquery, HEADLINE_OPTIONS
+        )
+        result = await db.execute(
+            select(models.Analysis, page.c.rank, headline)
+            .join(page, page.c.id == models.Analysis.id)
+            .options(*loaders.analysis_options())
+            .order_by(page.c.rank.desc(), models.Analysis.id.desc())
+        )
+        return [tuple(row) for row in result.unique().all()]
+
+    @staticmethod
+    async def _search_memory(db, query, skip, limit, author_id, ticker_symbol):
+        if not memory_index.loaded:
+            rows = await db.execute(select(models.Analysis.id, models.Analysis.title, models.Analysis.content))
+            memory_index.load(rows.all())
+        
+        scores = memory_index.search(query)
+        if not scores:
+            return []
+        
+        statement = SearchService._filter(
+            select(models.Analysis).options(*loaders.analysis_options()).filter(models.Analysis.id.in_(scores)),
+            author_id, ticker_symbol
+        )
+        analyses = (await db.scalars(statement)).unique().all()
+        analyses.sort(key=lambda analysis: (scores[analysis.id], analysis.id), reverse=True)
+        return [
+            (analysis, scores[analysis.id], memory_index.headline(analysis.id, query))
+            for analysis in analyses[skip:skip + limit]
+        ]
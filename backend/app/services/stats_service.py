@@ -0,0 +1,66 @@
+from sqlalchemy import func, select, case
+from .. import models
+
+
+def stats_columns():
+    """Correlated per-user aggregates, evaluated only for the rows selected"""
+    total_analyses = (
+        select(func.count(models.Analysis.id))
+        .where(models.Analysis.author_id == models.User.id)
+        .correlate(models.User)
+        .scalar_subquery()
+    )
+    success_count = (
+        select(func.coalesce(func.sum(case((models.Analysis.success_status == "success", 1), else_=0)), 0))
+        .where(models.Analysis.author_id == models.User.id)
+        .correlate(models.User)
+        .scalar_subquery()
+    )
+    subscriber_count = (
+        select(func.count(models.Subscription.id))
+        .where(
+            models.Subscription.creator_id == models.User.id,
+            models.Subscription.status == "active"
+        )
+        .correlate(models.User)
+        .scalar_subquery()
+    )
+    return (
+        total_analyses.label("total_analyses"),
+        success_count.label("success_count"),
+        subscriber_count.label("subscriber_count"),
+    )
+
+
+# Columns of UserResponse; hashed_password and other internals are never selected
+USER_COLUMNS = (
+    models.User.id,
+    models.User.username,
+    models.User.email,
+    models.User.full_name,
+    models.User.bio,
+    models.User.profile_image,
+    models.User.monthly_fee,
+    models.User.is_verified,
+    models.User.created_at,
+    models.User.updated_at,
+)
+
+
+def stored_stats_columns():
+    """UserWithStats statistics read from the analyst_stats row"""
+    total_analyses = func.coalesce(models.AnalystStats.total_analyses, 0)
+    return (
+        total_analyses.label("total_analyses"),
+        case((total_analyses > 0, models.AnalystStats.success_rate), else_=None).label("success_rate"),
+        func.coalesce(models.AnalystStats.subscriber_count, 0).label("subscriber_count"),
+    )
+
+
+class StatsService:
+    @staticmethod
+    def users_with_stats_statement():
+        """Statement yielding rows shaped like UserWithStats, for validation straight from the row"""
+        return select(*USER_COLUMNS, *stored_stats_columns()).outerjoin(
+            models.AnalystStats, models.AnalystStats.user_id == models.User.id
+        )
@@ -0,0 +1,102 @@
+import os
+from collections import Counter
+from typing import Iterable, List
+from sqlalchemy import delete, event, select, update
+from sqlalchemy.orm import Session
+from .. import models
+from ..database import upsert_insert
+from ..storage import blob_key, get_storage
+from ..uploads import SavedUpload
+from .image_service import variant_keys
+
+# Session.info key: storage keys of blobs first created in the current transaction
+_CREATED_KEYS = "created_blob_keys"
+
+
+def _extension(filename: str) -> str:
+    return os.path.splitext(filename or "")[1][:16]
+
+
+class StorageService:
+    @staticmethod
+    def store(db: Session, saved: List[SavedUpload]) -> List[models.StoredBlob]:
+        """Move staged uploads into content-addressed storage and take a reference on each blob"""
+        insert = upsert_insert(db)
+        storage = get_storage()
+        
+        blobs = []
+        for item in saved:
+            key = blob_key(item.digest, _extension(item.upload.filename))
+            # Concurrent uploads of the same content race on the same row, so count atomically
+            db.execute(insert(models.StoredBlob).values(
+                digest=item.digest,
+                path=key,
+                size=item.size,
+                content_type=item.upload.content_type,
+                ref_count=1
+            ).on_conflict_do_update(
+                index_elements=[models.StoredBlob.digest],
+                set_={"ref_count": models.StoredBlob.ref_count + 1}
+            ))
+            blob = db.get(models.StoredBlob, item.digest, populate_existing=True)
+            if blob.ref_count == 1:
+                db.info.setdefault(_CREATED_KEYS, set()).add(blob.path)
+            # Always put: a collect() that won the row lock has deleted the file along with the row
+            storage.put(blob.path, item.temp_path)
+            blobs.append(blob)
+        return blobs
+    
+    @staticmethod
+    def abort(db: Session) -> None:
+        """Roll back after store(), first deleting the blobs this transaction created
+
+        Call before the commit: the uncommitted rows still block concurrent store()s of the
+        same content, so no file another request relies on is removed. A failed commit
+        itself can leave unreferenced files behind, but never a row without its file.
+        """
+        storage = get_storage()
+        for key in db.info.pop(_CREATED_KEYS, ()):
+            storage.delete(key)
+        db.rollback()
+    
+    @staticmethod
+    def release(db: Session, digests: Iterable[str]) -> None:
+        """Drop one reference per digest; call collect() after the commit"""
+        for digest, count in Counter(d for d in digests if d).items():
+            db.execute(
+                update(models.StoredBlob)
+                .where(models.StoredBlob.digest == digest)
+                .values(ref_count=models.StoredBlob.ref_count - count)
+            )
+    
+    @staticmethod
+    def collect(db: Session, digests: Iterable[str]) -> None:
+        """Delete blobs, and their variants, that are no longer referenced"""
+        digests = {d for d in digests if d}
+        if not digests:
+            return
+        
+        # Lock the unreferenced rows and delete their files before the rows: a concurrent store()
+        # of the same content blocks on the lock and puts the file again after this commits
+        rows = db.execute(
+            select(models.StoredBlob.digest, models.StoredBlob.path)
+            .where(models.StoredBlob.digest.in_(digests), models.StoredBlob.ref_count <= 0)
+            .order_by(models.StoredBlob.digest)
+            .with_for_update()
+        ).all()
+        if not rows:
+            db.commit()
+            return
+        
+        storage = get_storage()
+        for _, key in rows:
+            for stored_key in [key, *variant_keys(key)]:
+                storage.delete(stored_key)
+        db.execute(delete(models.StoredBlob).where(models.StoredBlob.digest.in_([digest for digest, _ in rows])))
+        db.commit()
+
+
+@event.listens_for(Session, "after_commit")
+@event.listens_for(Session, "after_rollback")
+def _forget_created_blobs(session):
+    session.info.pop(_CREATED_KEYS, None)
@@ -1,53 +1,269 @@
 import stripe
 from typing import Optional
 from fastapi import HTTPException
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from ..cache import TTLCache
 from ..config import settings
+from ..database import upsert_insert
+from ..stripe_client import StripeAPIError, get_stripe_client
 
 stripe.api_key = settings.stripe_secret_key
+stripe.api_base = settings.stripe_api_base
+stripe.max_network_retries = settings.stripe_max_retries
+stripe.default_http_client = stripe.http_client.RequestsClient(timeout=settings.stripe_timeout_seconds)
+
+# (creator_id, unit_amount) -> Stripe price id; a fee change is a new key, so entries never go stale
+_price_cache = TTLCache(maxsize=settings.stripe_price_cache_size, ttl=settings.stripe_price_cache_ttl_seconds)
+
+
+def to_cents(amount: float) -> int:
+    return int(round(amount * 100))
+
+
+def _api_error(e: StripeAPIError) -> HTTPException:
+    if e.status_code is None:
+        # Stripe did not answer within the timeouts and retries
+        return HTTPException(status_code=503, detail="Payment provider unavailable")
+    return HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
+
+
+def _subscription_params(customer_id: str, price_id: str) -> dict:
+    return dict(
+        customer=customer_id,
+        items=[{"price": price_id}],
+        payment_behavior="default_incomplete",
+        payment_settings={"save_default_payment_method": "on_subscription"},
+        expand=["latest_invoice.payment_intent"],
+    )
+
+
+def _price_params(
+    amount: float,
+    currency: str,
+    recurring: str,
+    product_id: Optional[str],
+    product_name: Optional[str]
+) -> dict:
+    if product_id:
+        product = {"product": product_id}
+    else:
+        product = {"product_data": {"name": product_name or f"Monthly Subscription - ${amount}"}}
+    return dict(unit_amount=to_cents(amount), currency=currency, recurring={"interval": recurring}, **product)
+
+
+def _customer_id_statement(user_id: int):
+    return select(models.User.stripe_customer_id).filter(models.User.id == user_id)
+
+
+def _store_customer_statement(user_id: int, customer_id: str):
+    # Keeps the first stored customer if another request got there first
+    return (
+        update(models.User)
+        .filter(models.User.id == user_id, models.User.stripe_customer_id.is_(None))
+        .values(stripe_customer_id=customer_id)
+        .execution_options(synchronize_session=False)
+    )
+
+
+def _customer_idempotency_key(user: models.User) -> str:
+    # Concurrent first subscribes of one user get the same customer back from Stripe
+    return f"customer-user-{user.id}"
+
+
+def _product_id_statement(creator_id: int):
+    # Later prices of a creator are added to the product of the first one
+    return (
+        select(models.StripePrice.stripe_product_id)
+        .filter(models.StripePrice.creator_id == creator_id)
+        .limit(1)
+    )
+
+
+def _store_price_statement(db, creator_id: int, unit_amount: int, price: dict, product_id: Optional[str]):
+    return (
+        upsert_insert(db)(models.StripePrice)
+        .values(
+            creator_id=creator_id,
+            unit_amount=unit_amount,
+            stripe_price_id=price["id"],
+            stripe_product_id=product_id or price["product"]
+        )
+        .on_conflict_do_nothing(index_elements=["creator_id", "unit_amount"])
+    )
 
 
 class StripeService:
     @staticmethod
-    def create_customer(email: str, name: str) -> str:
+    def create_customer(email: str, name: str, idempotency_key: Optional[str] = None) -> str:
         """Create a Stripe customer"""
         try:
             customer = stripe.Customer.create(
                 email=email,
-                name=name
+                name=name,
+                idempotency_key=idempotency_key
             )
             return customer.id
         except stripe.error.StripeError as e:
             raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
     
+    @staticmethod
+    async def create_customer_async(email: str, name: str, idempotency_key: Optional[str] = None) -> str:
+        """Async variant of create_customer over the pooled client"""
+        try:
+            customer = await get_stripe_client().post(
+                "/v1/customers", {"email": email, "name": name}, idempotency_key=idempotency_key
+            )
+            return customer["id"]
+        except StripeAPIError as e:
+            raise _api_error(e)
+    
     @staticmethod
     def create_subscription(customer_id: str, price_id: str) -> dict:
         """Create a subscription"""
         try:
-            subscription = stripe.Subscription.create(
-                customer=customer_id,
-                items=[{"price": price_id}],
-                payment_behavior="default_incomplete",
-                payment_settings={"save_default_payment_method": "on_subscription"},
-                expand=["latest_invoice.payment_intent"],
-            )
+            subscription = stripe.Subscription.create(**_subscription_params(customer_id, price_id))
             return subscription
         except stripe.error.StripeError as e:
             raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
     
     @staticmethod
-    def create_price(amount: float, currency: str = "usd", recurring: str = "month") -> str:
-        """Create a price for subscription"""
+    async def create_subscription_async(customer_id: str, price_id: str) -> dict:
+        """Async variant of create_subscription over the pooled client"""
+        try:
+            return await get_stripe_client().post("/v1/subscriptions", _subscription_params(customer_id, price_id))
+        except StripeAPIError as e:
+            raise _api_error(e)
+    
+    @staticmethod
+    def create_price(
+        amount: float,
+        currency: str = "usd",
+        recurring: str = "month",
+        product_id: Optional[str] = None,
+        product_name: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
+        """Create a price for subscription, under an existing product or a new one"""
         try:
             price = stripe.Price.create(
-                unit_amount=int(amount * 100),  # Convert to cents
-                currency=currency,
-                recurring={"interval": recurring},
-                product_data={"name": f"Monthly Subscription - ${amount}"}
+                idempotency_key=idempotency_key,
+                **_price_params(amount, currency, recurring, product_id, product_name)
             )
-            return price.id
+            return price
         except stripe.error.StripeError as e:
             raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
     
+    @staticmethod
+    async def create_price_async(
+        amount: float,
+        currency: str = "usd",
+        recurring: str = "month",
+        product_id: Optional[str] = None,
+        product_name: Optional[str] = None,
+        idempotency_key: Optional[str] = None
+    ) -> dict:
+        """Async variant of create_price over the pooled client"""
+        try:
+            return await get_stripe_client().post(
+                "/v1/prices",
+                _price_params(amount, currency, recurring, product_id, product_name),
+                idempotency_key=idempotency_key
+            )
+        except StripeAPIError as e:
+            raise _api_error(e)
+    
+    @staticmethod
+    def get_or_create_customer(db: Session, user: models.User) -> str:
+        """Stripe customer of a user, created on first use and stored on the user"""
+        if user.stripe_customer_id:
+            return user.stripe_customer_id
+        # The user may come from the profile cache, so check the stored value first
+        customer_id = db.scalar(_customer_id_statement(user.id))
+        if customer_id:
+            return customer_id
+        
+        customer_id = StripeService.create_customer(
+            user.email,
+            user.full_name or user.username,
+            idempotency_key=_customer_idempotency_key(user)
+        )
+        db.execute(_store_customer_statement(user.id, customer_id))
+        db.commit()
+        return db.scalar(_customer_id_statement(user.id))
+    
+    @staticmethod
+    async def get_or_create_customer_async(db: AsyncSession, user: models.User) -> str:
+        """Async variant of get_or_create_customer"""
+        if user.stripe_customer_id:
+            return user.stripe_customer_id
+        customer_id = await db.scalar(_customer_id_statement(user.id))
+        if customer_id:
+            return customer_id
+        await db.commit()  # End the read transaction instead of holding it while Stripe answers
+        
+        customer_id = await StripeService.create_customer_async(
+            user.email,
+            user.full_name or user.username,
+            idempotency_key=_customer_idempotency_key(user)
+        )
+        await db.execute(_store_customer_statement(user.id, customer_id))
+        await db.commit()
+        return await db.scalar(_customer_id_statement(user.id))
+    
+    @staticmethod
+    def get_or_create_price(db: Session, creator: models.User) -> str:
+        """Price for the creator's current monthly fee; a new one is minted only when the fee changes"""
+        unit_amount = to_cents(creator.monthly_fee)
+        key = (creator.id, unit_amount)
+        price_id = _price_cache.get(key)
+        if price_id:
+            return price_id
+        
+        stored = db.get(models.StripePrice, key)
+        if stored is None:
+            product_id = db.scalar(_product_id_statement(creator.id))
+            price = StripeService.create_price(
+                creator.monthly_fee,
+                product_id=product_id,
+                product_name=f"Subscription to {creator.username}",
+                idempotency_key=f"price-{creator.id}-{unit_amount}"
+            )
+            db.execute(_store_price_statement(db, creator.id, unit_amount, price, product_id))
+            db.commit()
+            stored = db.get(models.StripePrice, key, populate_existing=True)
+        
+        _price_cache.set(key, stored.stripe_price_id)
+        return stored.stripe_price_id
+    
+    @staticmethod
+    async def get_or_create_price_async(db: AsyncSession, creator: models.User) -> str:
+        """Async variant of get_or_create_price"""
+        unit_amount = to_cents(creator.monthly_fee)
+        key = (creator.id, unit_amount)
+        price_id = _price_cache.get(key)
+        if price_id:
+            return price_id
+        
+        stored = await db.get(models.StripePrice, key)
+        if stored is None:
+            product_id = await db.scalar(_product_id_statement(creator.id))
+            await db.commit()  # End the read transaction instead of holding it while Stripe answers
+            price = await StripeService.create_price_async(
+                creator.monthly_fee,
+                product_id=product_id,
+                product_name=f"Subscription to {creator.username}",
+                idempotency_key=f"price-{creator.id}-{unit_amount}"
+            )
+            await db.execute(_store_price_statement(db, creator.id, unit_amount, price, product_id))
+            await db.commit()
+            stored = await db.get(models.StripePrice, key, populate_existing=True)
+        
+        _price_cache.set(key, stored.stripe_price_id)
+        return stored.stripe_price_id
+    
     @staticmethod
     def cancel_subscription(subscription_id: str) -> dict:
         """Cancel a subscription"""
@@ -60,6 +276,18 @@ class StripeService:
         except stripe.error.StripeError as e:
             raise HTTPException(status_code=400, detail=f"Stripe error: {str(e)}")
     
+    @staticmethod
+    async def cancel_subscription_async(subscription_id: str) -> dict:
+        """Async variant of cancel_subscription over the pooled client"""
+        try:
+            return await get_stripe_client().post(
+                f"/v1/subscriptions/{subscription_id}",
+                {"cancel_at_period_end": True},
+                idempotency_key=f"cancel-{subscription_id}"
+            )
+        except StripeAPIError as e:
+            raise _api_error(e)
+    
     @staticmethod
     def get_subscription(subscription_id: str) -> dict:
         """Get subscription details"""
@@ -93,4 +321,4 @@ class StripeService:
         except ValueError as e:
             raise HTTPException(status_code=400, detail="Invalid payload")
         except stripe.error.SignatureVerificationError as e:
-            raise HTTPException(status_code=400, detail="Invalid signature") 
\ No newline at end of file
+            raise HTTPException(status_code=400, detail="Invalid signature")
\ No newline at end of file
@@ -0,0 +1,86 @@
+from typing import Iterable, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from ..cache import TTLCache
+from ..config import settings
+from ..database import upsert_insert
+
+_popular_cache = TTLCache(maxsize=64, ttl=settings.popular_tags_cache_ttl_seconds)
+
+
+def parse_tags(names: Optional[Iterable[str]]) -> List[str]:
+    """Normalized, de-duplicated tag names; accepts a list or a comma-separated string"""
+    if names is None:
+        return []
+    if isinstance(names, str):
+        names = names.split(",")
+    
+    tags = []
+    for name in names:
+        tag = models.normalize_tag(name)
+        if tag and tag not in tags:
+            if len(tag) > settings.max_tag_length:
+                raise HTTPException(status_code=400, detail=f"Tags are limited to {settings.max_tag_length} characters")
+            tags.append(tag)
+    return tags
+
+
+class TagService:
+    @staticmethod
+    def upsert_tags(db: Session, names: List[str]) -> List[models.Tag]:
+        """Get or create tags by name in one INSERT ... ON CONFLICT DO NOTHING and one SELECT"""
+        if not names:
+            return []
+        # Sorted so concurrent upserts take row locks in the same order
+        db.execute(
+            upsert_insert(db)(models.Tag)
+            .values([{"name": name} for name in sorted(names)])
+            .on_conflict_do_nothing(index_elements=[models.Tag.name])
+        )
+        tags = {tag.name: tag for tag in db.scalars(select(models.Tag).filter(models.Tag.name.in_(names)))}
+        return [tags[name] for name in names]
+    
+    @staticmethod
+    def set_tags(db: Session, analysis: models.Analysis, names: List[str]) -> None:
+        if len(names) > settings.max_tags_per_analysis:
+            raise HTTPException(
+                status_code=400,
+                detail=f"An analysis can have at most {settings.max_tags_per_analysis} tags"
+            )
+        analysis.tags = TagService.upsert_tags(db, names)
+    
+    @staticmethod
+    def filter_by_tags(statement, names: List[str], match_all: bool = False):
+        """Restrict an Analysis query to those tagged with any (or all) of names, as an indexed semi-join"""
+        if not names:
+            return statement
+        tagged = select(models.analysis_tags.c.analysis_id).join(
+            models.Tag, models.Tag.id == models.analysis_tags.c.tag_id
+        ).filter(models.Tag.name.in_(names))
+        if match_all:
+            tagged = tagged.group_by(models.analysis_tags.c.analysis_id).having(
+                func.count(func.distinct(models.analysis_tags.c.tag_id)) == len(names)
+            )
+        return statement.filter(models.Analysis.id.in_(tagged))
+    
+    @staticmethod
+    async def popular(db: AsyncSession, limit: int) -> List[dict]:
+        """Most used tags with their analysis counts, cached for popular_tags_cache_ttl_seconds"""
+        cached = _popular_cache.get(limit)
+        if cached is not None:
+            return cached
+        
+        analysis_count = func.count(models.analysis_tags.c.analysis_id).label("analysis_count")
+        result = await db.execute(
+            select(models.Tag.name, analysis_count)
+            .join(models.analysis_tags, models.analysis_tags.c.tag_id == models.Tag.id)
+            .group_by(models.Tag.id, models.Tag.name)
+            .order_by(analysis_count.desc(), models.Tag.name)
+            .limit(limit)
+        )
+        popular = [{"name": name, "analysis_count": count} for name, count in result.all()]
+        _popular_cache.set(limit, popular)
+        return popular
@@ -0,0 +1,107 @@
+import bisect
+import heapq
+import threading
+import time
+from collections import Counter
+from typing import Dict, List, Tuple
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from .. import models
+from ..config import settings
+
+
+class TickerIndex:
+    """Sorted ticker symbols with analysis counts; a prefix is a contiguous slice found by bisection"""
+
+    def __init__(self):
+        self._symbols: List[str] = []
+        self._counts: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self.loaded_at = 0.0
+
+    def load(self, counts: Dict[str, int]) -> None:
+        with self._lock:
+            self._counts = {symbol: count for symbol, count in counts.items() if count > 0}
+            self._symbols = sorted(self._counts)
+            self.loaded_at = time.monotonic()
+
+    def apply(self, deltas: Dict[str, int]) -> None:
+        with self._lock:
+            for symbol, delta in deltas.items():
+                count = self._counts.get(symbol, 0) + delta
+                if count > 0:
+                    if symbol not in self._counts:
+                        bisect.insort(self._symbols, symbol)
+                    self._counts[symbol] = count
+                elif symbol in self._counts:
+                    del self._counts[symbol]
+                    del self._symbols[bisect.bisect_left(self._symbols, symbol)]
+
+    def suggest(self, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        """Symbols starting with prefix, most analysed first"""
+        with self._lock:
+            start = bisect.bisect_left(self._symbols, prefix)
+            end = bisect.bisect_left(self._symbols, prefix + "\uffff", lo=start)
+            return heapq.nsmallest(
+                limit,
+                ((symbol, self._counts[symbol]) for symbol in self._symbols[start:end]),
+                key=lambda item: (-item[1], item[0])
+            )
+
+    @property
+    def stale(self) -> bool:
+        return time.monotonic() - self.loaded_at > settings.ticker_index_refresh_seconds
+
+
+ticker_index = TickerIndex()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_ticker_changes(session, flush_context):
+    deltas = session.info.setdefault("ticker_changes", Counter())
+    for obj in session.new:
+        if isinstance(obj, models.Analysis) and obj.ticker_symbol:
+            deltas[obj.ticker_symbol] += 1
+    for obj in session.deleted:
+        if isinstance(obj, models.Analysis) and obj.ticker_symbol:
+            deltas[obj.ticker_symbol] -= 1
+    for obj in session.dirty:
+        if isinstance(obj, models.Analysis):
+            history = inspect(obj).attrs.ticker_symbol.history
+            for symbol in history.deleted:
+                if symbol:
+                    deltas[symbol] -= 1
+            for symbol in history.added:
+                if symbol:
+                    deltas[symbol] += 1
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_ticker_changes(session):
+    deltas = session.info.pop("ticker_changes", None)
+    if deltas:
+        ticker_index.apply(deltas)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_ticker_changes(session):
+    session.info.pop("ticker_changes", None)
+
+
+class TickerService:
+    @staticmethod
+    async def load(db: AsyncSession) -> None:
+        """(Re)build the prefix index from analysis counts per ticker"""
+        result = await db.execute(
+            select(models.Analysis.ticker_symbol, func.count())
+            .filter(models.Analysis.ticker_symbol.isnot(None))
+            .group_by(models.Analysis.ticker_symbol)
+        )
+        ticker_index.load(dict(result.all()))
+
+    @staticmethod
+    async def autocomplete(db: AsyncSession, prefix: str, limit: int) -> List[Tuple[str, int]]:
+        if ticker_index.stale:
+            await TickerService.load(db)
+        return ticker_index.suggest(models.normalize_ticker(prefix) or "", limit)
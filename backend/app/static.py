@@ -0,0 +1,134 @@
+import os
+import re
+from email.utils import formatdate
+from typing import List, Optional, Tuple
+import anyio
+from fastapi import HTTPException
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import StaticFiles
+from starlette.types import Receive, Scope, Send
+from .config import settings
+
+# Keys written by blob storage: ab/cd/<sha256>[_variant].ext; their content never changes
+CONTENT_ADDRESSED_PATH = re.compile(r"^[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64}[^/]*)$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+RANGE_HEADER = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def _etag_list(value: str) -> List[str]:
+    return [tag.strip().removeprefix("W/") for tag in value.split(",")]
+
+
+def parse_range(value: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """Inclusive byte range of a single-range Range header; multi-range requests get the whole file"""
+    match = RANGE_HEADER.match(value.strip()) if value else None
+    if not match or match.groups() == ("", ""):
+        return None
+    start, end = match.groups()
+    if start == "":
+        # Suffix range: the last N bytes
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start, end = int(start), min(int(end), size - 1) if end else size - 1
+    if start >= size or start > end:
+        raise HTTPException(status_code=416, headers={"content-range": f"bytes */{size}"})
+    return start, end
+
+
+class UploadFileResponse(FileResponse):
+    """FileResponse with byte ranges and server-side file sending when the ASGI server offers it"""
+
+    def __init__(self, *args, byte_range: Optional[Tuple[int, int]] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.byte_range = byte_range
+        if byte_range is not None:
+            start, end = byte_range
+            self.status_code = 206
+            self.headers["content-range"] = f"bytes {start}-{end}/{self.stat_result.st_size}"
+            self.headers["content-length"] = str(end - start + 1)
+
+    def set_stat_headers(self, stat_result) -> None:
+        self.headers.setdefault("content-length", str(stat_result.st_size))
+        self.headers.setdefault("last-modified", formatdate(stat_result.st_mtime, usegmt=True))
+        self.headers.setdefault("accept-ranges", "bytes")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+        extensions = scope.get("extensions") or {}
+        start, end = self.byte_range or (0, self.stat_result.st_size - 1)
+        
+        if self.send_header_only:
+            await send({"type": "http.response.body", "body": b"", "more_body": False})
+        elif self.byte_range is None and "http.response.pathsend" in extensions:
+            await send({"type": "http.response.pathsend", "path": os.fspath(self.path)})
+        elif "http.response.zerocopysend" in extensions:
+            # The server sendfile()s straight from the descriptor
+            with open(self.path, "rb") as file:
+                await send({
+                    "type": "http.response.zerocopysend",
+                    "file": file.fileno(),
+                    "offset": start,
+                    "count": end - start + 1,
+                })
+        else:
+            remaining = end - start + 1
+            async with await anyio.open_file(self.path, mode="rb") as file:
+                await file.seek(start)
+                while remaining > 0:
+                    chunk = await file.read(min(self.chunk_size, remaining))
+                    remaining -= len(chunk)
+                    await send({"type": "http.response.body", "body": chunk, "more_body": remaining > 0 and bool(chunk)})
+                    if not chunk:
+                        break
+        if self.background is not None:
+            await self.background()
+
+
+class UploadStaticFiles(StaticFiles):
+    """Serves /uploads with strong ETags, long-lived caching of content-addressed files and range requests"""
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope: Scope, status_code: int = 200) -> Response:
+        path = os.path.relpath(full_path, self.directory).replace(os.sep, "/")
+        if path.split("/", 1)[0] == "tmp":
+            # Staging area for uploads in progress
+            raise HTTPException(status_code=404)
+        
+        match = CONTENT_ADDRESSED_PATH.match(path)
+        if match:
+            etag = f'"{match.group(1)}"'
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f'"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+            cache_control = f"public, max-age={settings.uploads_cache_max_age}"
+        headers = {
+            "etag": etag,
+            "cache-control": cache_control,
+            "last-modified": formatdate(stat_result.st_mtime, usegmt=True),
+        }
+        
+        request_headers = Headers(scope=scope)
+        if status_code == 200 and self.is_not_modified(Headers(headers), request_headers):
+            return Response(status_code=304, headers=headers)
+        
+        return UploadFileResponse(
+            full_path,
+            status_code=status_code,
+            headers=headers,
+            stat_result=stat_result,
+            method=scope["method"],
+            byte_range=self._byte_range(request_headers, etag, stat_result.st_size) if status_code == 200 else None,
+        )
+
+    @staticmethod
+    def _byte_range(request_headers: Headers, etag: str, size: int) -> Optional[Tuple[int, int]]:
+        if_range = request_headers.get("if-range")
+        if if_range is not None and if_range != etag:
+            return None
+        return parse_range(request_headers.get("range"), size)
+
+    def is_not_modified(self, response_headers: Headers, request_headers: Headers) -> bool:
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match is not None:
+            return if_none_match.strip() == "*" or response_headers["etag"] in _etag_list(if_none_match)
+        return super().is_not_modified(response_headers, request_headers)
@@ -0,0 +1,126 @@
+import mimetypes
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Iterator, Optional
+from .config import settings
+
+try:
+    import boto3
+except ImportError:  # Only needed for the S3 backend
+    boto3 = None
+
+# Staging area for uploads before they are moved into storage; on the upload volume so moves are renames
+UPLOAD_TEMP_DIR = os.path.join(settings.upload_dir, "tmp")
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def blob_key(digest: str, extension: str = "") -> str:
+    """Content-addressed key sharded on the first two bytes of the digest, e.g. ab/cd/abcd...ef.png"""
+    return f"{digest[:2]}/{digest[2:4]}/{digest}{extension.lower()}"
+
+
+class StorageBackend(ABC):
+    """Where uploaded blobs live; keys are '/'-separated relative paths"""
+
+    @abstractmethod
+    def put(self, key: str, source_path: str) -> None:
+        """Move a local file into storage under key, replacing any existing blob"""
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a blob; missing blobs are ignored"""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL of a blob"""
+
+    @abstractmethod
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        """Yield a path on local disk holding the blob's content"""
+
+
+class LocalStorage(StorageBackend):
+    """Blobs in a directory tree served by the /uploads static mount"""
+
+    def __init__(self, root: str, public_url: str):
+        self.root = root
+        self.public_url = public_url.rstrip("/")
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def put(self, key: str, source_path: str) -> None:
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(source_path, path)
+
+    def delete(self, key: str) -> None:
+        try:
+            os.remove(self.path(key))
+        except FileNotFoundError:
+            pass
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        yield self.path(key)
+
+
+class S3Storage(StorageBackend):
+    """Blobs in an S3-compatible bucket (AWS, MinIO, R2, ...)"""
+
+    def __init__(self, bucket: str, endpoint_url: Optional[str], public_url: str):
+        if boto3 is None:
+            raise RuntimeError("boto3 is required for the s3 storage backend")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.client = boto3.client("s3", endpoint_url=endpoint_url, region_name=settings.s3_region)
+
+    def put(self, key: str, source_path: str) -> None:
+        content_type = mimetypes.guess_type(key)[0] or "application/octet-stream"
+        self.client.upload_file(source_path, self.bucket, key, ExtraArgs={
+            "ContentType": content_type,
+            # Content-addressed keys never change content
+            "CacheControl": "public, max-age=31536000, immutable",
+        })
+        os.remove(source_path)
+
+    def delete(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=key)
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url}/{key}"
+
+    @contextmanager
+    def local_path(self, key: str) -> Iterator[str]:
+        os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+        fd, path = tempfile.mkstemp(dir=UPLOAD_TEMP_DIR, suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.client.download_file(self.bucket, key, path)
+            yield path
+        finally:
+            os.remove(path)
+
+
+def get_storage() -> StorageBackend:
+    """Shared storage backend selected by settings.storage_backend"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if settings.storage_backend == "s3":
+                    _storage = S3Storage(settings.s3_bucket, settings.s3_endpoint_url, settings.storage_public_url)
+                elif settings.storage_backend == "local":
+                    _storage = LocalStorage(settings.upload_dir, settings.storage_public_url)
+                else:
+                    raise RuntimeError(f"Unknown storage backend {settings.storage_backend!r}")
+    return _storage
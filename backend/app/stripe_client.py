@@ -0,0 +1,157 @@
+import asyncio
+import random
+import uuid
+from urllib.parse import urlencode
+from typing import Any, Dict, List, Optional, Tuple
+import httpx
+from .config import settings
+
+# Same API version as the pinned stripe library, so both paths see the same objects
+STRIPE_API_VERSION = "2023-10-16"
+# Lock conflicts, rate limits and server errors; Stripe-Should-Retry overrides this when present
+RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+_client: Optional["AsyncStripeClient"] = None
+
+
+class StripeAPIError(Exception):
+    """Error response from Stripe, or no response at all after the last retry"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None, code: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.code = code
+
+
+def _encode(name: str, value: Any) -> List[Tuple[str, str]]:
+    if value is None:
+        return []
+    if isinstance(value, dict):
+        return [pair for key, inner in value.items() for pair in _encode(f"{name}[{key}]", inner)]
+    if isinstance(value, (list, tuple)):
+        return [pair for index, inner in enumerate(value) for pair in _encode(f"{name}[{index}]", inner)]
+    if isinstance(value, bool):
+        return [(name, "true" if value else "false")]
+    return [(name, str(value))]
+
+
+def encode_params(params: Dict[str, Any]) -> List[Tuple[str, str]]:
+    """Stripe's form encoding: nested dicts as a[b]=..., lists as a[0]=..., None omitted"""
+    return [pair for key, value in params.items() for pair in _encode(key, value)]
+
+
+class AsyncStripeClient:
+    """Stripe API over one pooled httpx.AsyncClient, with timeouts and jittered retries"""
+
+    def __init__(
+        self,
+        api_key: str,
+        api_base: str,
+        timeout: float,
+        connect_timeout: float,
+        max_retries: int,
+        max_connections: int,
+        transport: Optional[httpx.AsyncBaseTransport] = None
+    ):
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            base_url=api_base,
+            auth=(api_key, ""),
+            headers={"Stripe-Version": STRIPE_API_VERSION},
+            timeout=httpx.Timeout(timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport
+        )
+
+    async def request(
+        self,
+        method: str,
+        path: str,
+        params: Optional[Dict[str, Any]] = None,
+        idempotency_key: Optional[str] = None,
+        timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Send one API request and return the decoded object, retrying transient failures"""
+        headers = {}
+        encoded = encode_params(params or {})
+        if method == "POST":
+            # Retried POSTs replay the first result instead of creating a second object
+            headers["Idempotency-Key"] = idempotency_key or str(uuid.uuid4())
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+            options = {"content": urlencode(encoded)}
+        else:
+            options = {"params": encoded}
+        if timeout is not None:
+            options["timeout"] = timeout
+
+        for attempt in range(self.max_retries + 1):
+            last_attempt = attempt == self.max_retries
+            try:
+                response = await self._client.request(method, path, headers=headers, **options)
+            except httpx.TransportError as e:
+                # Connect errors and timeouts
+                if last_attempt:
+                    raise StripeAPIError(f"Stripe request failed: {e!r}") from e
+            else:
+                if response.status_code < 400:
+                    return response.json()
+                if last_attempt or not self._should_retry(response):
+                    raise self._error(response)
+            await asyncio.sleep(self._backoff(attempt))
+
+    @staticmethod
+    def _should_retry(response: httpx.Response) -> bool:
+        header = response.headers.get("stripe-should-retry")
+        if header is not None:
+            return header == "true"
+        return response.status_code in RETRY_STATUSES
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        # Full jitter, so requests that failed together do not retry together
+        ceiling = settings.stripe_retry_base_delay_seconds * 2 ** attempt
+        return random.uniform(0, min(ceiling, settings.stripe_retry_max_delay_seconds))
+
+    @staticmethod
+    def _error(response: httpx.Response) -> StripeAPIError:
+        try:
+            error = response.json().get("error", {})
+        except ValueError:
+            error = {}
+        message = error.get("message") or f"HTTP {response.status_code}"
+        return StripeAPIError(message, status_code=response.status_code, code=error.get("code"))
+
+    async def post(self, path: str, params: Optional[Dict[str, Any]] = None, **options) -> Dict[str, Any]:
+        return await self.request("POST", path, params, **options)
+
+    async def get(self, path: str, params: Optional[Dict[str, Any]] = None, **options) -> Dict[str, Any]:
+        return await self.request("GET", path, params, **options)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+
+def get_stripe_client() -> AsyncStripeClient:
+    """Process-wide async Stripe client, created on first use and closed by close_stripe_client
+
+    Pooled connections belong to the event loop that opened them, so the client lives
+    for the application lifespan and must not be shared across event loops.
+    """
+    global _client
+    if _client is None:
+        _client = AsyncStripeClient(
+            api_key=settings.stripe_secret_key,
+            api_base=settings.stripe_api_base,
+            timeout=settings.stripe_timeout_seconds,
+            connect_timeout=settings.stripe_connect_timeout_seconds,
+            max_retries=settings.stripe_max_retries,
+            max_connections=settings.stripe_max_connections
+        )
+    return _client
+
+
+async def close_stripe_client() -> None:
+    global _client
+    if _client is not None:
+        client, _client = _client, None
+        await client.aclose()
@@ -0,0 +1,85 @@
+import hashlib
+import os
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple
+from fastapi import HTTPException, UploadFile
+from .config import settings
+from .storage import UPLOAD_TEMP_DIR
+
+_upload_executor = ThreadPoolExecutor(
+    max_workers=settings.upload_workers,
+    thread_name_prefix="upload"
+)
+
+
+class SavedUpload(NamedTuple):
+    upload: UploadFile
+    digest: str  # sha256 of the content
+    size: int
+    temp_path: str
+
+
+def _too_large(upload: UploadFile) -> HTTPException:
+    return HTTPException(
+        status_code=413,
+        detail=f"{upload.filename} exceeds the maximum file size of {settings.max_file_size} bytes"
+    )
+
+
+def _remove(path: str) -> None:
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def save_upload(upload: UploadFile) -> SavedUpload:
+    """Copy an upload into a staging file in fixed-size chunks, hashing as it goes and aborting once max_file_size is exceeded
+
+    Starlette has already spooled the whole part by the time this runs, so this is a second copy
+    onto the upload volume (where storage moves are renames) and the size check bounds what is
+    kept, not what is received; BodyLimitMiddleware bounds the request while it arrives.
+    """
+    if upload.size is not None and upload.size > settings.max_file_size:
+        raise _too_large(upload)
+
+    fd, temp_path = tempfile.mkstemp(dir=UPLOAD_TEMP_DIR)
+    digest = hashlib.sha256()
+    written = 0
+    try:
+        with os.fdopen(fd, "wb") as buffer:
+            while chunk := upload.file.read(settings.upload_chunk_size):
+                written += len(chunk)
+                if written > settings.max_file_size:
+                    raise _too_large(upload)
+                digest.update(chunk)
+                buffer.write(chunk)
+    except BaseException:
+        _remove(temp_path)
+        raise
+    return SavedUpload(upload, digest.hexdigest(), written, temp_path)
+
+
+def save_uploads(uploads: List[UploadFile]) -> List[SavedUpload]:
+    """Stage several uploads concurrently off the request thread; on any failure none are kept"""
+    os.makedirs(UPLOAD_TEMP_DIR, exist_ok=True)
+    futures = [_upload_executor.submit(save_upload, upload) for upload in uploads]
+
+    saved, errors = [], []
+    for future in futures:
+        try:
+            saved.append(future.result())
+        except Exception as e:
+            errors.append(e)
+
+    if errors:
+        discard_uploads(saved)
+        raise errors[0]
+    return saved
+
+
+def discard_uploads(saved: List[SavedUpload]) -> None:
+    """Remove staged uploads that were not moved into storage"""
+    for item in saved:
+        _remove(item.temp_path)
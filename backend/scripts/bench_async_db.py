@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of the sync and async database paths.
+
+Starts one uvicorn worker serving the same analysis feed query twice:
+once as a sync endpoint on SessionLocal (threadpool) and once as an
+async endpoint on AsyncSessionLocal (asyncpg), then drives each with the
+same number of concurrent clients and reports requests per second.
+
+Usage: DATABASE_URL=postgresql://... python scripts/bench_async_db.py [concurrency] [seconds]
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from app import models, loaders
+from app.database import get_db, get_async_db
+
+PORT = 8765
+PAGE_SIZE = 20
+
+bench_app = FastAPI()
+
+
+def feed_statement():
+    return select(models.Analysis).options(*loaders.analysis_options()).order_by(
+        models.Analysis.created_at.desc(), models.Analysis.id.desc()
+    ).limit(PAGE_SIZE)
+
+
+@bench_app.get("/sync")
+def sync_feed(db: Session = Depends(get_db)):
+    return len(db.scalars(feed_statement()).all())
+
+
+@bench_app.get("/async")
+async def async_feed(db: AsyncSession = Depends(get_async_db)):
+    return len((await db.scalars(feed_statement())).all())
+
+
+async def drive(path: str, concurrency: int, seconds: float) -> float:
+    deadline = time.perf_counter() + seconds
+    completed = 0
+
+    async def client_loop(client):
+        nonlocal completed
+        while time.perf_counter() < deadline:
+            response = await client.get(path)
+            response.raise_for_status()
+            completed += 1
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+    return completed / seconds
+
+
+def wait_for_server():
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/sync")
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.bench_async_db:bench_app",
+         "--port", str(PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    try:
+        wait_for_server()
+        print(f"🗄️  Feed query throughput, 1 worker, {concurrency} concurrent clients, {seconds:.0f}s each")
+        for name, path in [("sync (threadpool)", "/sync"), ("async (AsyncSession)", "/async")]:
+            asyncio.run(drive(path, concurrency, 1))  # Warm up pools
+            throughput = asyncio.run(drive(path, concurrency, seconds))
+            print(f"  {name:<20} {throughput:8.1f} req/s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of per-request JWT verification cost.
+
+Compares a full python-jose decode (signature verification on every
+request, the behaviour before the verified-token cache) with
+auth.verify_token on a warm cache.
+
+Usage: python scripts/bench_auth.py [iterations]
+"""
+
+import os
+import sys
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import HTTPException
+from jose import jwt
+from app import auth
+from app.config import settings
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    token = auth.create_access_token({"sub": "bench", "uid": 1, "ver": 1})
+    credentials_exception = HTTPException(status_code=401)
+
+    def full_decode():
+        jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+
+    def cached_verify():
+        auth.verify_token(token, credentials_exception)
+
+    cached_verify()  # Warm the cache
+
+    results = [
+        ("jwt.decode (before)", timeit.timeit(full_decode, number=iterations)),
+        ("auth.verify_token, cached (after)", timeit.timeit(cached_verify, number=iterations)),
+    ]
+
+    print(f"🔐 JWT verification, {iterations} iterations")
+    for name, total in results:
+        print(f"  {name:<36} {total / iterations * 1e6:8.2f} µs/request")
+    print(f"  speedup: {results[0][1] / results[1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
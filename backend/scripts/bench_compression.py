@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+CPU-vs-bytes trade-off of response compression levels.
+
+Builds realistic list pages (full analyses, analysis summaries and users with
+statistics), then compresses each with gzip levels 1-9 and, when the brotli
+package is installed, brotli qualities 0-11 using the same compressors as
+CompressionMiddleware. Reports compressed size, ratio and CPU time per page,
+to pick COMPRESSION_GZIP_LEVEL / COMPRESSION_BROTLI_QUALITY.
+
+Usage: python scripts/bench_compression.py [page_size] [iterations]
+"""
+
+import os
+import random
+import sys
+import timeit
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app import compression
+from app.serialization import ANALYSIS_LIST, USER_WITH_STATS_LIST, analysis_fields_adapter, parse_analysis_fields
+from scripts.bench_serialization import make_analyses, make_user_rows
+
+GZIP_LEVELS = [1, 3, 5, 6, 9]
+BROTLI_QUALITIES = [0, 2, 4, 5, 7, 9, 11]
+WORDS = (
+    "revenue margin guidance growth quarter earnings valuation multiple cash flow debt "
+    "buyback dividend demand supply chain inventory pricing competition market share "
+    "risk catalyst upside downside consensus estimate outlook segment cloud services "
+    "hardware consumer enterprise regulatory interest rates inflation capex"
+).split()
+
+
+def realistic_text(rng, words):
+    # Repeated lorem ipsum compresses far better than real prose
+    return " ".join(rng.choice(WORDS) for _ in range(words)) + "."
+
+
+def make_pages(page_size):
+    rng = random.Random(0)
+    analyses = make_analyses(page_size)
+    for analysis in analyses:
+        analysis.content = realistic_text(rng, 400)
+    summary = parse_analysis_fields("summary")
+    items = [
+        ("analyses", ANALYSIS_LIST, analyses),
+        ("analysis summaries", analysis_fields_adapter(summary), analyses),
+        ("users with stats", USER_WITH_STATS_LIST, make_user_rows(page_size)),
+    ]
+    return [(name, adapter.dump_json(adapter.validate_python(page, from_attributes=True))) for name, adapter, page in items]
+
+
+def compress(encoding, level, body):
+    compressor = compression._BrotliCompressor(level) if encoding == "br" else compression._GzipCompressor(level)
+    return compressor.compress(body) + compressor.finish()
+
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+
+    settings = [("gzip", level) for level in GZIP_LEVELS]
+    if compression.brotli is not None:
+        settings += [("br", quality) for quality in BROTLI_QUALITIES]
+    else:
+        print("⚠️  brotli is not installed, measuring gzip only")
+
+    print(f"🗜️  Compression of {page_size}-item pages, {iterations} iterations")
+    for name, body in make_pages(page_size):
+        print(f"  {name}: {len(body) / 1024:.1f} KiB uncompressed")
+        for encoding, level in settings:
+            size = len(compress(encoding, level, body))
+            seconds = timeit.timeit(lambda: compress(encoding, level, body), number=iterations) / iterations
+            print(
+                f"    {encoding:<4} {level:>2}  {size / 1024:8.1f} KiB  ratio {len(body) / size:5.1f}x"
+                f"  {seconds * 1e3:7.2f} ms/page  {len(body) / seconds / 2**20:7.1f} MiB/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark of list response serialization cost per item.
+
+Serializes a page of analyses (with author, images and tags) and a page of
+users with statistics three ways:
+
+  before:  per-item Pydantic validation to dicts, then stdlib json
+           (FastAPI's response_model path with JSONResponse)
+  orjson:  the same validation, encoded with orjson (ORJSONResponse)
+  adapter: one prebuilt TypeAdapter validating ORM objects / result rows by
+           attribute and dumping JSON bytes directly (serialization.json_response)
+
+Usage: python scripts/bench_serialization.py [page_size] [iterations]
+"""
+
+import json
+import os
+import sys
+import timeit
+from collections import namedtuple
+from datetime import datetime, timezone
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from app import models, schemas
+from app.serialization import ANALYSIS_LIST, USER_WITH_STATS_LIST
+from app.services.stats_service import USER_COLUMNS
+
+
+def make_analyses(count):
+    now = datetime.now(timezone.utc)
+    author = models.User(
+        id=1, username="analyst", email="analyst@example.com", full_name="An Analyst",
+        bio="Long-only tech investor. " * 10, is_verified=True, monthly_fee=9.0,
+        created_at=now, updated_at=now
+    )
+    tags = [models.Tag(id=i, name=name, created_at=now) for i, name in enumerate(["tech", "earnings", "ai"])]
+    analyses = []
+    for i in range(count):
+        analysis = models.Analysis(
+            id=i, title=f"Analysis {i}", content="Lorem ipsum dolor sit amet. " * 80,
+            target_price=200.0, current_price=180.0, time_horizon="6 months", ticker_symbol="AAPL",
+            success_status="pending", author_id=1, created_at=now, updated_at=now
+        )
+        analysis.author = author
+        analysis.tags = tags
+        analysis.images = [models.AnalysisImage(
+            id=i, analysis_id=i, image_path=f"ab/cd/{i:064x}.png", blob_digest=f"{i:064x}",
+            caption="chart", variants={"thumbnail": f"ab/cd/{i:064x}_thumbnail.jpg"}, created_at=now
+        )]
+        analyses.append(analysis)
+    return analyses
+
+
+def make_user_rows(count):
+    now = datetime.now(timezone.utc)
+    Row = namedtuple("Row", [column.key for column in USER_COLUMNS] + ["total_analyses", "success_rate", "subscriber_count"])
+    return [
+        Row(i, f"user{i}", f"user{i}@example.com", "Full Name", "Bio " * 20, None, 5.0, False, now, now, 40, 52.5, 120)
+        for i in range(count)
+    ]
+
+
+def main():
+    page_size = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    analyses = make_analyses(page_size)
+    user_rows = make_user_rows(page_size)
+
+    cases = [
+        ("analyses", schemas.AnalysisResponse, ANALYSIS_LIST, analyses),
+        ("users with stats", schemas.UserWithStats, USER_WITH_STATS_LIST, user_rows),
+    ]
+    print(f"📦 Serialization of {page_size}-item pages, {iterations} iterations")
+    for name, model, adapter, items in cases:
+        def before():
+            json.dumps(jsonable_encoder([model.model_validate(item, from_attributes=True) for item in items])).encode()
+
+        def with_orjson():
+            orjson.dumps([model.model_validate(item, from_attributes=True).model_dump(mode="json") for item in items])
+
+        def with_adapter():
+            adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+
+        results = [(label, timeit.timeit(fn, number=iterations)) for label, fn in [
+            ("before (validate + json)", before),
+            ("orjson", with_orjson),
+            ("TypeAdapter dump_json", with_adapter),
+        ]]
+        print(f"  {name}")
+        for label, total in results:
+            print(f"    {label:<26} {total / iterations / page_size * 1e6:8.2f} µs/item")
+        print(f"    speedup: {results[0][1] / results[-1][1]:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Subscription throughput against the local fake Stripe server.
+
+Starts scripts/fake_stripe.py with the given added latency and one uvicorn
+worker of the backend pointed at it, registers creators and subscribers,
+then has every subscriber subscribe to every creator with a fixed number of
+concurrent clients. Reports subscribes per second, latency percentiles and
+the Stripe calls made (customers and prices are created once, then reused).
+
+SQLite (the default, in a temporary directory) serializes writers and starts
+failing with "database is locked" at high concurrency; use PostgreSQL for
+representative numbers.
+
+Usage: [DATABASE_URL=postgresql://...] python scripts/bench_subscriptions.py
+           [concurrency] [subscribers] [creators] [stripe_latency_ms]
+"""
+
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+
+APP_PORT = 8767
+STRIPE_PORT = 12111
+PASSWORD = "bench-password"
+
+
+def wait_for(url):
+    for _ in range(100):
+        try:
+            httpx.get(url)
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+async def register(client, username, monthly_fee=0.0):
+    response = await client.post("/api/v1/auth/register", json={
+        "username": username, "email": f"{username}@example.com", "password": PASSWORD, "monthly_fee": monthly_fee
+    })
+    response.raise_for_status()
+    user_id = response.json()["id"]
+    response = await client.post("/api/v1/auth/token", data={"username": username, "password": PASSWORD})
+    response.raise_for_status()
+    return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+
+async def run(concurrency, subscribers, creators):
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{APP_PORT}", limits=limits, timeout=60) as client:
+        run_id = int(time.time())
+        creator_ids = [
+            (await register(client, f"creator{run_id}_{i}", monthly_fee=5 + i))[0] for i in range(creators)
+        ]
+        subscriber_headers = [
+            (await register(client, f"subscriber{run_id}_{i}"))[1] for i in range(subscribers)
+        ]
+        jobs = asyncio.Queue()
+        for headers in subscriber_headers:
+            for creator_id in creator_ids:
+                jobs.put_nowait((headers, creator_id))
+        latencies, failures = [], 0
+
+        async def client_loop():
+            nonlocal failures
+            while not jobs.empty():
+                headers, creator_id = jobs.get_nowait()
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/v1/subscriptions/", json={"creator_id": creator_id}, headers=headers)
+                    response.raise_for_status()
+                except httpx.HTTPError:
+                    failures += 1
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[client_loop() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+    return latencies, failures, elapsed
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    subscribers = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    creators = int(sys.argv[3]) if len(sys.argv) > 3 else 4
+    stripe_latency_ms = float(sys.argv[4]) if len(sys.argv) > 4 else 100
+
+    workdir = tempfile.mkdtemp(prefix="bench_subscriptions_")
+    env = {
+        **os.environ,
+        "STRIPE_API_BASE": f"http://127.0.0.1:{STRIPE_PORT}",
+        "BCRYPT_ROUNDS": "4",
+        "UPLOAD_DIR": os.path.join(workdir, "uploads"),
+    }
+    env.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(workdir, 'bench.db')}")
+
+    stripe_server = subprocess.Popen(
+        [sys.executable, "scripts/fake_stripe.py", "--port", str(STRIPE_PORT), "--latency-ms", str(stripe_latency_ms)],
+        cwd=BACKEND_DIR
+    )
+    app_server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(APP_PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR, env=env
+    )
+    try:
+        wait_for(f"http://127.0.0.1:{STRIPE_PORT}/_stats")
+        wait_for(f"http://127.0.0.1:{APP_PORT}/health")
+        total = subscribers * creators
+        print(f"💳 {total} subscribes ({subscribers} subscribers x {creators} creators), "
+              f"{concurrency} concurrent clients, Stripe latency {stripe_latency_ms:.0f} ms")
+        latencies, failures, elapsed = asyncio.run(run(concurrency, subscribers, creators))
+        latencies.sort()
+        print(f"  throughput  {total / elapsed:8.1f} subscribes/s")
+        print(f"  latency     p50 {statistics.median(latencies) * 1e3:.0f} ms, "
+              f"p95 {latencies[int(len(latencies) * 0.95) - 1] * 1e3:.0f} ms")
+        print(f"  failures    {failures}")
+        print("  Stripe calls")
+        for name, count in sorted(httpx.get(f"http://127.0.0.1:{STRIPE_PORT}/_stats").json().items()):
+            print(f"    {name:<28} {count}")
+    finally:
+        app_server.terminate()
+        stripe_server.terminate()
+        app_server.wait()
+        stripe_server.wait()
+
+
+if __name__ == "__main__":
+    main()
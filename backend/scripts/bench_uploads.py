@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Throughput benchmark of image serving from /uploads.
+
+Starts one uvicorn worker serving the same content-addressed image through
+Starlette's StaticFiles (before) and UploadStaticFiles (after), then drives
+each with concurrent clients fetching the full image, and once more with
+browser-style revalidation (If-None-Match) that the strong ETag turns into
+304s. Reports requests and megabytes per second per worker.
+
+Usage: python scripts/bench_uploads.py [concurrency] [seconds] [image_kb]
+"""
+
+import asyncio
+import hashlib
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from fastapi import FastAPI
+from fastapi.staticfiles import StaticFiles
+from app.static import UploadStaticFiles
+from app.storage import blob_key
+
+PORT = 8766
+UPLOAD_DIR = os.environ.setdefault("BENCH_UPLOAD_DIR", tempfile.mkdtemp(prefix="bench_uploads_"))
+
+bench_app = FastAPI()
+bench_app.mount("/plain", StaticFiles(directory=UPLOAD_DIR), name="plain")
+bench_app.mount("/uploads", UploadStaticFiles(directory=UPLOAD_DIR), name="uploads")
+
+
+def write_image(size_kb: int) -> str:
+    content = os.urandom(size_kb * 1024)
+    key = blob_key(hashlib.sha256(content).hexdigest(), ".jpg")
+    path = os.path.join(UPLOAD_DIR, *key.split("/"))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(content)
+    return key
+
+
+async def drive(path: str, concurrency: int, seconds: float, revalidate: bool = False):
+    deadline = time.perf_counter() + seconds
+    completed = 0
+    received = 0
+
+    async def client_loop(client):
+        nonlocal completed, received
+        etag = None
+        while time.perf_counter() < deadline:
+            headers = {"If-None-Match": etag} if revalidate and etag else {}
+            response = await client.get(path, headers=headers)
+            if response.status_code not in (200, 304):
+                response.raise_for_status()
+            etag = response.headers.get("etag")
+            completed += 1
+            received += len(response.content)
+
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", limits=limits) as client:
+        await asyncio.gather(*[client_loop(client) for _ in range(concurrency)])
+    return completed / seconds, received / seconds / 1e6
+
+
+def wait_for_server():
+    for _ in range(100):
+        try:
+            httpx.get(f"http://127.0.0.1:{PORT}/docs")
+            return
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    raise RuntimeError("Benchmark server did not start")
+
+
+def main():
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 32
+    seconds = float(sys.argv[2]) if len(sys.argv) > 2 else 10
+    image_kb = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+    key = write_image(image_kb)
+
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "scripts.bench_uploads:bench_app",
+         "--port", str(PORT), "--workers", "1", "--log-level", "warning"],
+        cwd=BACKEND_DIR
+    )
+    try:
+        wait_for_server()
+        print(f"🖼️  {image_kb}KB image, 1 worker, {concurrency} concurrent clients, {seconds:.0f}s each")
+        runs = [
+            ("StaticFiles, full GET", f"/plain/{key}", False),
+            ("StaticFiles, revalidate", f"/plain/{key}", True),
+            ("UploadStaticFiles, full GET", f"/uploads/{key}", False),
+            ("UploadStaticFiles, revalidate", f"/uploads/{key}", True),
+        ]
+        for name, path, revalidate in runs:
+            asyncio.run(drive(path, concurrency, 1, revalidate))  # Warm up
+            throughput, megabytes = asyncio.run(drive(path, concurrency, seconds, revalidate))
+            print(f"  {name:<30} {throughput:8.1f} req/s {megabytes:8.1f} MB/s")
+        print("  Browsers holding an immutable response skip even the revalidation request.")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
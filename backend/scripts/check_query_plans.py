@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Check that PostgreSQL uses the hot-path indexes for the router queries.
+
+Runs EXPLAIN for a representative version of each query against
+DATABASE_URL and reports which index the planner picked. Sequential
+scans are disabled for the session so that small development tables
+still show whether an index is usable for the predicate.
+
+Usage: DATABASE_URL=postgresql://... python scripts/check_query_plans.py
+"""
+
+import json
+import os
+import sys
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, text
+from app import models
+from app.database import engine
+from app.pagination import apply_cursor, encode_cursor
+from app.services.leaderboard_service import LeaderboardService
+from app.services.stats_service import StatsService, stats_columns
+
+FEED_KEY = [models.Analysis.created_at, models.Analysis.id]
+CURSOR = encode_cursor([datetime(2030, 1, 1), 2 ** 31 - 1])
+USER_CURSOR = encode_cursor([0])
+RANK_CURSOR = encode_cursor([100.0, 2 ** 31 - 1])
+
+
+def router_queries():
+    """(description, statement, expected index) for each hot predicate"""
+    return [
+        (
+            "GET /analyses",
+            apply_cursor(select(models.Analysis), FEED_KEY, CURSOR).limit(100),
+            "ix_analyses_created_at_id",
+        ),
+        (
+            "GET /analyses?author_id=",
+            apply_cursor(select(models.Analysis).filter(models.Analysis.author_id == 1), FEED_KEY, CURSOR).limit(100),
+            "ix_analyses_author_id_created_at",
+        ),
+        (
+            "GET /analyses?ticker_symbol=",
+            apply_cursor(select(models.Analysis).filter(models.Analysis.ticker_symbol == "AAPL"), FEED_KEY, CURSOR).limit(100),
+            "ix_analyses_ticker_symbol_created_at",
+        ),
+        (
+            "GET /users",
+            apply_cursor(
+                StatsService.users_with_stats_statement(), [models.User.id], USER_CURSOR, descending=False
+            ).limit(100),
+            "analyst_stats_pkey",
+        ),
+        (
+            "GET /users?order_by=success_rate",
+            apply_cursor(
+                LeaderboardService.ranked_users_statement("success_rate"),
+                LeaderboardService.ranking_columns("success_rate"),
+                RANK_CURSOR
+            ).limit(100),
+            "ix_analyst_stats_success_rate",
+        ),
+        (
+            "Leaderboard refresh (analyst statistics)",
+            select(models.User.id, *stats_columns()).where(models.User.id == 1),
+            "ix_analyses_author_id_success_status",
+        ),
+        (
+            "Leaderboard refresh (subscriber count)",
+            select(func.count(models.Subscription.id)).where(
+                models.Subscription.creator_id == 1,
+                models.Subscription.status == "active"
+            ),
+            "ix_subscriptions_creator_id_status",
+        ),
+        (
+            "GET /analyses/{id} (entitlement check)",
+            select(models.Subscription).where(
+                models.Subscription.subscriber_id == 1,
+                models.Subscription.creator_id == 2,
+                models.Subscription.status == "active"
+            ),
+            "ix_subscriptions_subscriber_id_creator_id_status",
+        ),
+        (
+            "AnalysisResponse.images (selectin)",
+            select(models.AnalysisImage).where(models.AnalysisImage.analysis_id.in_([1, 2, 3])),
+            "ix_analysis_images_analysis_id",
+        ),
+        (
+            "AnalysisResponse.tags (selectin)",
+            select(models.analysis_tags).where(models.analysis_tags.c.analysis_id.in_([1, 2, 3])),
+            "ix_analysis_tags_analysis_id",
+        ),
+        (
+            "Analyses by tag",
+            select(models.analysis_tags.c.analysis_id).where(models.analysis_tags.c.tag_id == 1),
+            "ix_analysis_tags_tag_id_analysis_id",
+        ),
+    ]
+
+
+def plan_indexes(plan: dict) -> set:
+    """Collect every index name referenced in an EXPLAIN (FORMAT JSON) plan"""
+    found = set()
+    if "Index Name" in plan:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found |= plan_indexes(child)
+    return found
+
+
+def main():
+    if engine.dialect.name != "postgresql":
+        print(f"❌ Query plans can only be checked against PostgreSQL, not {engine.dialect.name}")
+        sys.exit(1)
+
+    failures = 0
+    with engine.connect() as connection:
+        connection.execute(text("SET enable_seqscan = off"))
+        for description, statement, expected in router_queries():
+            sql = str(statement.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = connection.execute(text(f"EXPLAIN (FORMAT JSON) {sql}")).scalar()
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            used = plan_indexes(plan[0]["Plan"])
+            if expected in used:
+                print(f"✅ {description}: {expected}")
+            else:
+                failures += 1
+                print(f"❌ {description}: expected {expected}, planner used {sorted(used) or 'no index'}")
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
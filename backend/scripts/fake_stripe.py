@@ -0,0 +1,213 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the parts of the Stripe API the backend uses.
+
+Serves customers, products, prices, subscriptions and payment intents from
+memory, honours Idempotency-Key like Stripe (a repeated key replays the first
+response), and can add latency and transient failures so timeouts, retries and
+subscription throughput can be exercised without network access.
+
+Point the backend at it with STRIPE_API_BASE=http://127.0.0.1:12111 (both the
+async client and the stripe library use it). GET /_stats returns request counts.
+
+Usage: python scripts/fake_stripe.py [--port 12111] [--latency-ms 0] [--error-rate 0]
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import re
+import time
+from collections import Counter
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+KEY_PART = re.compile(r"\[([^\]]*)\]")
+OBJECT_ID = re.compile(r"/[a-z]+_\w+$")
+
+fake_app = FastAPI()
+latency_seconds = 0.0
+error_rate = 0.0
+
+_ids = itertools.count(1)
+_objects = {}
+_idempotent_responses = {}
+_stats = Counter()
+
+
+def decode_params(pairs):
+    """Inverse of Stripe's form encoding: a[b][0]=x becomes {"a": {"b": ["x"]}}"""
+    root = {}
+    for name, value in pairs:
+        keys = [name.split("[", 1)[0], *KEY_PART.findall(name)]
+        node = root
+        for key in keys[:-1]:
+            node = node.setdefault(key, {})
+        # a[]=x&a[]=y appends
+        node[keys[-1] or str(len(node))] = value
+    return _lists(root)
+
+
+def _lists(node):
+    # Stripe encodes lists as a[0], a[1] or a[]
+    if not isinstance(node, dict):
+        return node
+    values = {key: _lists(value) for key, value in node.items()}
+    if values and all(key.isdigit() for key in values):
+        return [values[key] for key in sorted(values, key=int)]
+    return values
+
+
+def new_object(kind, prefix, **fields):
+    obj = {"id": f"{prefix}_{next(_ids):014d}", "object": kind, "created": int(time.time()), "livemode": False, **fields}
+    _objects[obj["id"]] = obj
+    return obj
+
+
+def error(status, message, should_retry=None):
+    headers = {"stripe-should-retry": "true" if should_retry else "false"} if should_retry is not None else None
+    return JSONResponse({"error": {"type": "api_error", "message": message}}, status_code=status, headers=headers)
+
+
+def create_customer(params):
+    return new_object("customer", "cus", email=params.get("email"), name=params.get("name"))
+
+
+def create_product(params):
+    return new_object("product", "prod", name=params.get("name"), active=True)
+
+
+def create_price(params):
+    product = params.get("product") or create_product(params.get("product_data", {}))["id"]
+    return new_object(
+        "price", "price",
+        product=product,
+        unit_amount=int(params["unit_amount"]),
+        currency=params.get("currency", "usd"),
+        recurring=params.get("recurring"),
+        active=True
+    )
+
+
+def create_subscription(params):
+    now = int(time.time())
+    price = _objects.get(params["items"][0]["price"])
+    if price is None:
+        return error(400, f"No such price: '{params['items'][0]['price']}'")
+    intent = new_object("payment_intent", "pi", amount=price["unit_amount"], currency=price["currency"], status="requires_payment_method")
+    intent["client_secret"] = f"{intent['id']}_secret_fake"
+    invoice = new_object("invoice", "in", payment_intent=intent, status="open")
+    return new_object(
+        "subscription", "sub",
+        customer=params["customer"],
+        items={"object": "list", "data": [{"price": price}]},
+        status="incomplete",
+        cancel_at_period_end=False,
+        current_period_start=now,
+        current_period_end=now + 30 * 24 * 3600,
+        latest_invoice=invoice
+    )
+
+
+def create_payment_intent(params):
+    intent = new_object("payment_intent", "pi", amount=int(params["amount"]), currency=params.get("currency", "usd"), status="requires_payment_method")
+    intent["client_secret"] = f"{intent['id']}_secret_fake"
+    return intent
+
+
+CREATE = {
+    "customers": create_customer,
+    "products": create_product,
+    "prices": create_price,
+    "subscriptions": create_subscription,
+    "payment_intents": create_payment_intent,
+}
+
+
+@fake_app.middleware("http")
+async def simulate_network(request: Request, call_next):
+    if request.url.path.startswith("/v1/"):
+        _stats[f"{request.method} {OBJECT_ID.sub('/{id}', request.url.path)}"] += 1
+        if latency_seconds:
+            await asyncio.sleep(latency_seconds)
+        if error_rate and random.random() < error_rate:
+            _stats["injected errors"] += 1
+            return error(500, "Injected failure", should_retry=True)
+    return await call_next(request)
+
+
+@fake_app.post("/v1/{resource}")
+async def create(resource: str, request: Request):
+    if resource not in CREATE:
+        return error(404, f"Unrecognized request URL (POST: /v1/{resource})")
+
+    key = request.headers.get("idempotency-key")
+    if key and key in _idempotent_responses:
+        _stats["idempotent replays"] += 1
+        status, body = _idempotent_responses[key]
+        return JSONResponse(body, status_code=status, headers={"idempotent-replayed": "true"})
+
+    result = CREATE[resource](decode_params((await request.form()).multi_items()))
+    if isinstance(result, JSONResponse):
+        status, body = result.status_code, json.loads(result.body)
+    else:
+        status, body = 200, result
+    if key:
+        _idempotent_responses[key] = (status, body)
+    return JSONResponse(body, status_code=status)
+
+
+@fake_app.get("/v1/{resource}/{object_id}")
+async def retrieve(resource: str, object_id: str):
+    obj = _objects.get(object_id)
+    if obj is None:
+        return error(404, f"No such {resource.rstrip('s')}: '{object_id}'")
+    return obj
+
+
+@fake_app.post("/v1/{resource}/{object_id}")
+async def modify(resource: str, object_id: str, request: Request):
+    obj = _objects.get(object_id)
+    if obj is None:
+        return error(404, f"No such {resource.rstrip('s')}: '{object_id}'")
+    for name, value in decode_params((await request.form()).multi_items()).items():
+        obj[name] = {"true": True, "false": False}.get(value, value) if isinstance(value, str) else value
+    return obj
+
+
+@fake_app.delete("/v1/subscriptions/{object_id}")
+async def cancel(object_id: str):
+    obj = _objects.get(object_id)
+    if obj is None:
+        return error(404, f"No such subscription: '{object_id}'")
+    obj["status"] = "canceled"
+    return obj
+
+
+@fake_app.get("/_stats")
+async def stats():
+    return dict(_stats)
+
+
+def main():
+    global latency_seconds, error_rate
+    
+    parser = argparse.ArgumentParser(description="Local fake of the Stripe API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=12111)
+    parser.add_argument("--latency-ms", type=float, default=0, help="Added to every API request")
+    parser.add_argument("--error-rate", type=float, default=0, help="Fraction of requests answered with a retryable 500")
+    args = parser.parse_args()
+    latency_seconds = args.latency_ms / 1000
+    error_rate = args.error_rate
+
+    print(f"💳 Fake Stripe on http://{args.host}:{args.port} (latency {args.latency_ms:.0f} ms, error rate {error_rate:.0%})")
+    uvicorn.run(fake_app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
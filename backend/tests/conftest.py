@@ -0,0 +1,77 @@
+import os
+import sys
+import tempfile
+import uuid
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Settings are read on import, so point the app at a throwaway SQLite database first
+_workdir = tempfile.mkdtemp(prefix="backend_tests_")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_workdir, 'test.db')}")
+os.environ.setdefault("UPLOAD_DIR", os.path.join(_workdir, "uploads"))
+os.environ.setdefault("RAISE_ON_LAZY_LOAD", "1")
+os.environ.setdefault("REDIS_CACHE_ENABLED", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+
+from fastapi.testclient import TestClient
+
+from app.database import SessionLocal
+from app.main import app
+
+PASSWORD = "test-password"
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def register(client):
+    """Register a user with a unique name; returns (user_id, auth headers)"""
+    def register(monthly_fee: float = 0.0):
+        username = f"user_{uuid.uuid4().hex[:12]}"
+        response = client.post("/api/v1/auth/register", json={
+            "username": username, "email": f"{username}@example.com", "password": PASSWORD, "monthly_fee": monthly_fee
+        })
+        assert response.status_code == 200, response.text
+        user_id = response.json()["id"]
+        response = client.post("/api/v1/auth/token", data={"username": username, "password": PASSWORD})
+        assert response.status_code == 200, response.text
+        return user_id, {"Authorization": f"Bearer {response.json()['access_token']}"}
+    return register
+
+
+@pytest.fixture
+def create_analysis(client):
+    """Publish an analysis with one image as the given user; returns its JSON"""
+    def create_analysis(headers, title: str = "Analysis", ticker_symbol: str = "AAPL", tags: str = ""):
+        response = client.post(
+            "/api/v1/analyses",
+            data={
+                "title": title,
+                "content": "Revenue growth and margins support the target",
+                "target_price": 100,
+                "time_horizon": "1y",
+                "ticker_symbol": ticker_symbol,
+                "tags": tags,
+            },
+            files={"image1": ("chart.png", b"\x89PNG chart", "image/png")},
+            headers=headers
+        )
+        assert response.status_code == 200, response.text
+        return response.json()
+    return create_analysis
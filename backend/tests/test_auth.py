@@ -0,0 +1,18 @@
+from jose import jwt
+
+from app.config import settings
+
+
+def test_principal_from_claims_and_legacy_tokens(client, register):
+    user_id, headers = register()
+    assert client.get("/api/v1/subscriptions/", headers=headers).status_code == 200
+
+    username = client.get("/api/v1/users/me", headers=headers).json()["username"]
+    # Issued before user ids were embedded in the claims
+    legacy = jwt.encode({"sub": username, "exp": 9999999999}, settings.secret_key, algorithm=settings.algorithm)
+    response = client.get("/api/v1/users/me", headers={"Authorization": f"Bearer {legacy}"})
+    assert response.status_code == 200
+    assert response.json()["id"] == user_id
+
+    unknown = jwt.encode({"sub": "nobody", "exp": 9999999999}, settings.secret_key, algorithm=settings.algorithm)
+    assert client.get("/api/v1/subscriptions/", headers={"Authorization": f"Bearer {unknown}"}).status_code == 401
@@ -0,0 +1,54 @@
+import logging
+
+import redis
+
+from app import cache, models
+from app.config import settings
+from app.services.entitlement_service import EntitlementService
+
+
+class FlakyRedis:
+    """In-memory stand-in for the Redis client whose deletes can be made to fail"""
+
+    def __init__(self):
+        self.data = {}
+        self.fail_deletes = False
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def delete(self, *keys):
+        if self.fail_deletes:
+            raise redis.ConnectionError("Connection refused")
+        for key in keys:
+            self.data.pop(key, None)
+
+
+def test_failed_invalidation_is_logged_and_bypasses_redis(db, monkeypatch, caplog, register):
+    fake = FlakyRedis()
+    monkeypatch.setattr(settings, "redis_cache_enabled", True)
+    monkeypatch.setattr(cache, "_redis_client", fake)
+    monkeypatch.setattr(cache, "_redis_down_until", 0.0)
+    creator_id, _ = register(monthly_fee=5)
+    subscriber_id, _ = register()
+
+    subscription = models.Subscription(subscriber_id=subscriber_id, creator_id=creator_id, status="active")
+    db.add(subscription)
+    db.commit()
+    assert EntitlementService.is_subscribed(db, subscriber_id, creator_id) is True
+    assert fake.data[f"entitlement:{subscriber_id}:{creator_id}"] == "1"
+
+    subscription.status = "canceled"
+    db.commit()
+    fake.fail_deletes = True
+    with caplog.at_level(logging.WARNING, logger="app.cache"):
+        EntitlementService.invalidate(subscriber_id, creator_id)
+    assert "Could not delete" in caplog.text
+
+    # Redis is back with the stale entry still in it; the database answers and replaces it
+    monkeypatch.setattr(cache, "_redis_down_until", 0.0)
+    assert EntitlementService.is_subscribed(db, subscriber_id, creator_id) is False
+    assert fake.data[f"entitlement:{subscriber_id}:{creator_id}"] == "0"
@@ -0,0 +1,53 @@
+import uuid
+
+from app import models
+from app.config import settings
+from app.services.stripe_service import StripeService
+
+
+def feed_titles(client, headers):
+    response = client.get("/api/v1/feed", headers=headers)
+    assert response.status_code == 200, response.text
+    return [analysis["title"] for analysis in response.json()]
+
+
+def activate_by_webhook(client, db, monkeypatch, subscriber_id, creator_id):
+    stripe_subscription_id = f"sub_{uuid.uuid4().hex}"
+    db.add(models.Subscription(
+        subscriber_id=subscriber_id,
+        creator_id=creator_id,
+        stripe_subscription_id=stripe_subscription_id,
+        status="incomplete"
+    ))
+    db.commit()
+    event = {"type": "invoice.payment_succeeded", "data": {"object": {"subscription": stripe_subscription_id}}}
+    monkeypatch.setattr(StripeService, "verify_webhook_signature", staticmethod(lambda payload, signature: event))
+    response = client.post("/api/v1/subscriptions/webhook", content=b"{}", headers={"stripe-signature": "test"})
+    assert response.status_code == 200, response.text
+
+
+def test_subscribe_backfills_recent_analyses_then_fans_out(client, db, monkeypatch, register, create_analysis):
+    monkeypatch.setattr(settings, "feed_backfill_size", 2)
+    creator_id, creator_headers = register(monthly_fee=5)
+    subscriber_id, subscriber_headers = register()
+    for title in ("first", "second", "third"):
+        create_analysis(creator_headers, title=title)
+
+    activate_by_webhook(client, db, monkeypatch, subscriber_id, creator_id)
+    assert feed_titles(client, subscriber_headers) == ["third", "second"]
+
+    create_analysis(creator_headers, title="fourth")
+    assert feed_titles(client, subscriber_headers) == ["fourth", "third", "second"]
+
+
+def test_large_creators_are_merged_at_read_time(client, db, monkeypatch, register, create_analysis):
+    creator_id, creator_headers = register(monthly_fee=5)
+    subscriber_id, subscriber_headers = register()
+    activate_by_webhook(client, db, monkeypatch, subscriber_id, creator_id)
+
+    monkeypatch.setattr(settings, "feed_fanout_max_subscribers", 0)
+    analysis = create_analysis(creator_headers, title="pulled")
+
+    assert db.get(models.Analysis, analysis["id"]).fanned_out is False
+    assert db.query(models.TimelineEntry).filter_by(analysis_id=analysis["id"]).count() == 0
+    assert feed_titles(client, subscriber_headers) == ["pulled"]
@@ -0,0 +1,12 @@
+from app.config import settings
+
+
+def test_db_pool_stats_require_the_internal_token(client, monkeypatch):
+    assert client.get("/health/db-pool").status_code == 404
+
+    monkeypatch.setattr(settings, "db_pool_stats_token", "internal-secret")
+    assert client.get("/health/db-pool").status_code == 404
+    assert client.get("/health/db-pool", headers={"X-Internal-Token": "wrong"}).status_code == 404
+    response = client.get("/health/db-pool", headers={"X-Internal-Token": "internal-secret"})
+    assert response.status_code == 200
+    assert set(response.json()) == {"sync", "async"}
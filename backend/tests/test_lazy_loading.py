@@ -0,0 +1,43 @@
+import pytest
+
+from app import models
+from app.config import settings
+
+
+@pytest.fixture
+def scenario(client, db, register, create_analysis):
+    """An author with tagged analyses and one active subscriber"""
+    author_id, author_headers = register(monthly_fee=5)
+    subscriber_id, subscriber_headers = register()
+    db.add(models.Subscription(subscriber_id=subscriber_id, creator_id=author_id, status="active"))
+    db.commit()
+    analyses = [create_analysis(author_headers, title=f"Analysis {i}", tags="earnings,growth") for i in range(3)]
+    return {
+        "author_id": author_id,
+        "analysis_id": analyses[0]["id"],
+        "author": author_headers,
+        "subscriber": subscriber_headers,
+    }
+
+
+@pytest.mark.parametrize("path, caller", [
+    ("/api/v1/analyses", None),
+    ("/api/v1/analyses?fields=summary", None),
+    ("/api/v1/analyses?fields=id,title,author,tags", None),
+    ("/api/v1/analyses?author_id={author_id}", None),
+    ("/api/v1/analyses?tags=earnings,growth&tag_match=all", None),
+    ("/api/v1/analyses/{analysis_id}", "subscriber"),
+    ("/api/v1/analyses/{analysis_id}", "author"),
+    ("/api/v1/feed", "subscriber"),
+    ("/api/v1/feed?fields=summary", "subscriber"),
+    ("/api/v1/users/me/analyses", "author"),
+    ("/api/v1/users/me/subscriptions", "subscriber"),
+    ("/api/v1/users/me/subscribers", "author"),
+    ("/api/v1/subscriptions/", "subscriber"),
+])
+def test_endpoints_load_relationships_up_front(client, scenario, path, caller):
+    # With the guard on, any relationship left to lazy loading raises instead of querying
+    assert settings.raise_on_lazy_load
+    response = client.get(path.format(**scenario), headers=scenario[caller] if caller else None)
+    assert response.status_code == 200, response.text
+    assert response.json()
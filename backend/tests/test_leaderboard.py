@@ -0,0 +1,53 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app import models
+from app.database import SessionLocal
+
+
+def stored_stats(db, user_id):
+    db.expire_all()
+    stats = db.get(models.AnalystStats, user_id)
+    return stats.total_analyses, stats.success_count, stats.success_rate, stats.subscriber_count
+
+
+def test_stats_follow_repeated_writes(db, register, create_analysis):
+    author_id, headers = register(monthly_fee=5)
+    assert stored_stats(db, author_id) == (0, 0, 0.0, 0)
+
+    first = create_analysis(headers)
+    create_analysis(headers)
+    assert stored_stats(db, author_id) == (2, 0, 0.0, 0)
+
+    db.get(models.Analysis, first["id"]).success_status = "success"
+    db.commit()
+    assert stored_stats(db, author_id) == (2, 1, 50.0, 0)
+
+    subscriber_ids = [register()[0] for _ in range(3)]
+    subscriptions = [
+        models.Subscription(subscriber_id=subscriber_id, creator_id=author_id, status="active")
+        for subscriber_id in subscriber_ids
+    ]
+    db.add_all(subscriptions)
+    db.commit()
+    assert stored_stats(db, author_id) == (2, 1, 50.0, 3)
+
+    subscriptions[0].status = "canceled"
+    db.commit()
+    db.delete(subscriptions[1])
+    db.commit()
+    assert stored_stats(db, author_id) == (2, 1, 50.0, 1)
+
+
+def test_concurrent_subscribes_count_every_subscriber(db, register):
+    creator_id, _ = register(monthly_fee=5)
+    subscriber_ids = [register()[0] for _ in range(8)]
+
+    def subscribe(subscriber_id):
+        with SessionLocal() as session:
+            session.add(models.Subscription(subscriber_id=subscriber_id, creator_id=creator_id, status="active"))
+            session.commit()
+
+    with ThreadPoolExecutor(max_workers=len(subscriber_ids)) as pool:
+        list(pool.map(subscribe, subscriber_ids))
+
+    assert stored_stats(db, creator_id)[3] == len(subscriber_ids)
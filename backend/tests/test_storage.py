@@ -0,0 +1,73 @@
+import hashlib
+import os
+import uuid
+
+import pytest
+
+from app import models
+from app.services.feed_service import FeedService
+from app.storage import get_storage
+
+
+def post_analysis(client, headers, content):
+    return client.post(
+        "/api/v1/analyses",
+        data={"title": "Chart", "content": "Chart attached", "target_price": 1, "time_horizon": "1y"},
+        files={"image1": ("chart.png", content, "image/png")},
+        headers=headers
+    )
+
+
+def blob_file(db, content):
+    blob = db.get(models.StoredBlob, hashlib.sha256(content).hexdigest(), populate_existing=True)
+    return blob, blob and os.path.exists(get_storage().path(blob.path))
+
+
+def fail_fan_out(monkeypatch):
+    def fan_out(db, analysis):
+        raise RuntimeError("fan-out failed")
+    monkeypatch.setattr(FeedService, "fan_out", staticmethod(fan_out))
+
+
+def test_failed_create_removes_the_blobs_it_created(client, db, monkeypatch, register):
+    _, headers = register()
+    content = b"\x89PNG " + uuid.uuid4().bytes
+    fail_fan_out(monkeypatch)
+
+    with pytest.raises(RuntimeError):
+        post_analysis(client, headers, content)
+
+    db.expire_all()
+    assert blob_file(db, content)[0] is None
+    digest = hashlib.sha256(content).hexdigest()
+    assert not any(digest in name for _, _, names in os.walk(get_storage().root) for name in names)
+
+
+def test_failed_create_keeps_blobs_shared_with_others(client, db, monkeypatch, register):
+    _, headers = register()
+    content = b"\x89PNG " + uuid.uuid4().bytes
+    assert post_analysis(client, headers, content).status_code == 200
+
+    fail_fan_out(monkeypatch)
+    with pytest.raises(RuntimeError):
+        post_analysis(client, headers, content)
+
+    blob, exists = blob_file(db, content)
+    assert blob.ref_count == 1 and exists
+
+
+def test_delete_collects_unreferenced_blobs_and_reupload_restores_them(client, db, register):
+    _, headers = register()
+    content = b"\x89PNG " + uuid.uuid4().bytes
+    analysis_id = post_analysis(client, headers, content).json()["id"]
+    blob, exists = blob_file(db, content)
+    path = get_storage().path(blob.path)
+    assert exists
+
+    assert client.delete(f"/api/v1/analyses/{analysis_id}", headers=headers).status_code == 200
+    db.expire_all()
+    assert blob_file(db, content)[0] is None and not os.path.exists(path)
+
+    assert post_analysis(client, headers, content).status_code == 200
+    blob, exists = blob_file(db, content)
+    assert blob.ref_count == 1 and exists
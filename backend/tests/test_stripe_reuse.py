@@ -0,0 +1,63 @@
+import httpx
+import pytest
+
+from app import models, stripe_client
+from app.stripe_client import AsyncStripeClient
+from scripts.fake_stripe import fake_app, _stats
+
+
+@pytest.fixture
+def stripe_calls(monkeypatch):
+    """Route the async Stripe client to the in-process fake; returns a function counting calls since setup"""
+    fake = AsyncStripeClient(
+        api_key="sk_test",
+        api_base="http://fake-stripe",
+        timeout=5,
+        connect_timeout=5,
+        max_retries=0,
+        max_connections=10,
+        transport=httpx.ASGITransport(app=fake_app)
+    )
+    monkeypatch.setattr(stripe_client, "_client", fake)
+    before = _stats.copy()
+    return lambda path: _stats[f"POST {path}"] - before[f"POST {path}"]
+
+
+def subscribe(client, headers, creator_id):
+    response = client.post("/api/v1/subscriptions/", json={"creator_id": creator_id}, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def test_customers_and_prices_are_created_once_and_reused(client, db, register, stripe_calls):
+    first_creator, _ = register(monthly_fee=5)
+    second_creator, _ = register(monthly_fee=7)
+    subscriber, subscriber_headers = register()
+    other_subscriber, other_headers = register()
+
+    subscribe(client, subscriber_headers, first_creator)
+    subscribe(client, subscriber_headers, second_creator)
+    subscribe(client, other_headers, first_creator)
+
+    # One customer per subscriber and one price per creator fee
+    assert stripe_calls("/v1/customers") == 2
+    assert stripe_calls("/v1/prices") == 2
+    assert stripe_calls("/v1/subscriptions") == 3
+    customer_id = db.get(models.User, subscriber).stripe_customer_id
+    assert customer_id and customer_id != db.get(models.User, other_subscriber).stripe_customer_id
+
+
+def test_fee_change_mints_a_price_under_the_same_product(client, db, register, stripe_calls):
+    creator_id, creator_headers = register(monthly_fee=5)
+    subscribe(client, register()[1], creator_id)
+
+    response = client.put("/api/v1/users/me", json={"monthly_fee": 9}, headers=creator_headers)
+    assert response.status_code == 200, response.text
+    subscribe(client, register()[1], creator_id)
+    subscribe(client, register()[1], creator_id)
+
+    assert stripe_calls("/v1/prices") == 2
+    prices = db.query(models.StripePrice).filter_by(creator_id=creator_id).order_by(models.StripePrice.unit_amount).all()
+    assert [price.unit_amount for price in prices] == [500, 900]
+    assert prices[0].stripe_product_id == prices[1].stripe_product_id
+    assert prices[0].stripe_price_id != prices[1].stripe_price_id
@@ -0,0 +1,38 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+
+from app import models
+from app.body_limit import BodyLimitMiddleware
+from app.config import settings
+
+
+def limited_app(max_body_size):
+    app = FastAPI()
+    app.add_middleware(BodyLimitMiddleware, max_body_size=max_body_size)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_body_limit_checks_declared_and_streamed_sizes():
+    client = limited_app(max_body_size=10)
+    assert client.post("/echo", content=b"x" * 10).json() == {"size": 10}
+    assert client.post("/echo", content=b"x" * 11).status_code == 413
+    # Chunked, so only counting the received bytes catches it
+    assert client.post("/echo", content=iter([b"x" * 6, b"x" * 6])).status_code == 413
+
+
+def test_oversized_image_creates_nothing(client, db, monkeypatch, register):
+    monkeypatch.setattr(settings, "max_file_size", 4)
+    user_id, headers = register()
+    response = client.post(
+        "/api/v1/analyses",
+        data={"title": "Too big", "content": "Chart attached", "target_price": 1, "time_horizon": "1y"},
+        files={"image1": ("chart.png", b"\x89PNG chart", "image/png")},
+        headers=headers
+    )
+    assert response.status_code == 413
+    assert db.query(models.Analysis).filter_by(author_id=user_id).count() == 0
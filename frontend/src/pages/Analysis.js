@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { analysesAPI, subscriptionsAPI } from '../services/api';
+import { analysesAPI, subscriptionsAPI, mediaUrl } from '../services/api';
 import { toast } from 'react-hot-toast';
 import { 
   TrendingUp, 
@@ -235,7 +235,7 @@ const Analysis = () => {
                 {analysis.images.map((image, index) => (
                   <div key={index} className="space-y-2">
                     <img
-                      src={`${process.env.REACT_APP_API_URL}/uploads/${image.filename}`}
+                      src={mediaUrl(image.url)}
                       alt={`Analysis ${index + 1}`}
                       className="w-full rounded-lg shadow-sm"
                     />
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { analysesAPI } from '../services/api';
+import { analysesAPI, thumbnailUrl } from '../services/api';
 import { TrendingUp, Clock, User, Eye } from 'lucide-react';
 
 const Home = () => {
@@ -117,7 +117,7 @@ const Home = () => {
                         {analysis.images.slice(0, 3).map((image, index) => (
                           <img
                             key={index}
-                            src={`${process.env.REACT_APP_API_URL}/uploads/${image.filename}`}
+                            src={thumbnailUrl(image)}
                             alt={`Analysis ${index + 1}`}
                             className="h-20 w-20 object-cover rounded-lg"
                           />
@@ -1,7 +1,7 @@
 import React, { useState, useEffect } from 'react';
 import { useParams, Link } from 'react-router-dom';
 import { useAuth } from '../contexts/AuthContext';
-import { usersAPI, analysesAPI, subscriptionsAPI } from '../services/api';
+import { usersAPI, analysesAPI, subscriptionsAPI, thumbnailUrl } from '../services/api';
 import { toast } from 'react-hot-toast';
 import {
   TrendingUp,
@@ -357,7 +357,7 @@ const UserProfile = () => {
                   {/* Analysis Image */}
                   {analysis.images && analysis.images.length > 0 && (
                     <img
-                      src={`${process.env.REACT_APP_API_URL}/uploads/${analysis.images[0].filename}`}
+                      src={thumbnailUrl(analysis.images[0])}
                       alt="Analysis"
                       className="w-full lg:w-32 h-32 lg:h-24 object-cover rounded-lg"
                     />
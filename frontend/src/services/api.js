@@ -2,6 +2,12 @@ import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
+// Uploads on the API server come back as relative paths, S3/CDN objects as absolute URLs
+export const mediaUrl = (url) => (/^https?:\/\//.test(url) ? url : `${API_BASE_URL}${url}`);
+
+// Smallest rendition of an image for list views, falling back to the original
+export const thumbnailUrl = (image) => mediaUrl(image.variant_urls?.thumbnail || image.url);
+
 export const api = axios.create({
   baseURL: `${API_BASE_URL}/api/v1`,
 });